@@ -0,0 +1,91 @@
+"""
+Benchmark de tempo de import
+Mede com `python -X importtime` o custo de importar cada ponto de entrada e
+falha (--check) se o caminho de scoring voltar a carregar módulos pesados
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+HEAVY_MODULES = ['numpy', 'pandas', 'pyarrow', 'joblib', 'sklearn', 'matplotlib', 'seaborn']
+
+# Ponto de entrada -> módulos pesados que ele NÃO pode importar
+ENTRY_POINTS = {
+    'scoring_rules': HEAVY_MODULES,
+    'scoring_model': HEAVY_MODULES,
+    'model_store': HEAVY_MODULES,
+    'ingestion': HEAVY_MODULES + ['asyncio'],
+    'cli': HEAVY_MODULES + ['asyncio'],
+    'lead_scoring_analysis': ['sklearn', 'matplotlib', 'seaborn'],
+    'utils': ['sklearn', 'matplotlib', 'seaborn'],
+}
+
+
+def import_profile(module):
+    """(tempo cumulativo em ms, módulos de topo importados) a partir de -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cum, name = line.split('|')
+        try:
+            cumulative[name.strip()] = int(cum) / 1000
+        except ValueError:
+            continue  # cabeçalho
+    loaded = {name.strip().split('.')[0] for name in cumulative}
+    return cumulative.get(module, 0.0), loaded
+
+
+def cli_latency(repeat):
+    """Melhor tempo de `cli.py score` para um lead (processo completo)"""
+    cmd = [sys.executable, os.path.join(SRC_DIR, 'cli.py'), 'score',
+           '--lead', '{"Lead Source": "Google", "TotalVisits": 3}']
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(repeat, check):
+    failures = []
+    print("📦 Tempo de import por ponto de entrada:")
+    for module, forbidden in ENTRY_POINTS.items():
+        best, loaded = min(import_profile(module) for _ in range(repeat))
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+        print(f"  {module:<24} {best:8.1f} ms  pesados: {', '.join(heavy) or '-'}")
+        bad = [name for name in forbidden if name in loaded]
+        if bad:
+            failures.append(f"{module} importa {', '.join(bad)}")
+
+    print(f"\n⚡ cli.py score (1 lead, processo completo): {cli_latency(repeat):.0f} ms")
+
+    if failures:
+        print("\n❌ Regressão de import:")
+        for failure in failures:
+            print(f"  {failure}")
+        if check:
+            sys.exit(1)
+    else:
+        print("\n✅ Nenhum import pesado fora do lugar")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3, help='Execuções por medição (melhor tempo)')
+    parser.add_argument('--check', action='store_true', help='Sai com erro se houver regressão')
+    args = parser.parse_args()
+
+    run(args.repeat, args.check)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark da inferência do modelo ML
+Compara a latência do predict_proba do scikit-learn (DataFrame + modelo) com a
+floresta achatada (inference.py) para 1 lead e lotes pequenos, e confere que as
+probabilidades são idênticas
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from model_store import MODELS_DIR
+from scoring_model import LeadScorer, encode_features
+
+
+def per_call_us(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(data_path, models_dir, batch_sizes, repeat):
+    scorer = LeadScorer().load_model(models_dir=models_dir)
+    df = pd.read_csv(data_path)
+    leads = df[scorer.features].to_dict('records')
+
+    def sklearn_proba(batch):
+        X = encode_features(pd.DataFrame.from_records(batch), scorer.features, scorer.le_dict)
+        return scorer.model.predict_proba(X)[:, 1]
+
+    expected = scorer.model.predict_proba(encode_features(df, scorer.features, scorer.le_dict))[:, 1]
+    flat = scorer.fast_model.forest.predict_proba(scorer.fast_model.encoder.encode_frame(df))
+    identical = np.array_equal(expected, flat)
+    print(f"🤖 Modelo {scorer.model_version} | {len(scorer.model.estimators_)} árvores | "
+          f"{len(df):,} leads: {'✅ idêntico ao scikit-learn' if identical else '❌ DIVERGENTE'}")
+
+    for size in batch_sizes:
+        batch = leads[:size]
+        slow = per_call_us(lambda: sklearn_proba(batch), max(1, repeat // 20))
+        fast = per_call_us(lambda: scorer.fast_model.predict_proba_records(batch), repeat)
+        print(f"  {size:>4} leads: scikit-learn {slow:>9,.0f}µs | floresta achatada {fast:>8,.0f}µs "
+              f"| speedup {slow / fast:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    # O modelo foi treinado com nomes de colunas; a floresta achatada recebe arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    run(args.data, args.models_dir, args.batch_sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
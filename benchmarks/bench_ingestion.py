@@ -0,0 +1,53 @@
+"""
+Benchmark da ingestão contínua
+Alimenta o pipeline asyncio com o produtor simulado em taxas crescentes e
+mede throughput, latência ponta a ponta (recepção → gravação) e quanto tempo
+a fonte ficou bloqueada por backpressure
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ingestion import IngestionPipeline, load_scorer, simulated_source
+
+
+def run(data_path, rates, events, max_batch, max_wait, use_model):
+    scorer = load_scorer(use_model)
+    print(f"🤖 Modelo: {scorer.model_version or 'nenhum (somente regras)'} | "
+          f"lote máx. {max_batch} | janela {max_wait * 1000:.0f}ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in rates:
+            pipeline = IngestionPipeline(scorer, os.path.join(tmp, f'events_{rate}.csv'), max_batch, max_wait)
+            leads = json.loads(pd.read_csv(data_path, usecols=pipeline.columns).to_json(orient='records'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = asyncio.run(pipeline.run(simulated_source(leads, rate, events)))
+            s = stats.summary()
+            print(f"  {rate:>9,.0f} eventos/s pedidos → {s['events_per_second']:>9,.0f} gravados/s | "
+                  f"p50 {s['p50_ms']:7.1f}ms | p99 {s['p99_ms']:7.1f}ms | "
+                  f"lote médio {s['avg_batch']:5.0f} | backpressure {s['backpressure_seconds']:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1_000, 5_000, 20_000, 100_000])
+    parser.add_argument('--events', type=int, default=50_000)
+    parser.add_argument('--max-batch', type=int, default=500)
+    parser.add_argument('--max-wait-ms', type=float, default=200)
+    parser.add_argument('--no-model', action='store_true')
+    args = parser.parse_args()
+
+    run(args.data, args.rates, args.events, args.max_batch, args.max_wait_ms / 1000, not args.no_model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de memória do carregamento de leads
+Compara o pico de memória (RSS) do frame original com o frame compacto
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from lead_scoring_analysis import ML_FEATURES, build_feature_matrix
+from storage import load_compact
+
+
+def original_path(data_path):
+    """Carga e preparação de features como eram antes (read_csv + copy + LabelEncoder)"""
+    df = pd.read_csv(data_path)
+    ml_df = df[ML_FEATURES + ['Converted']].copy()
+    for col in ML_FEATURES:
+        if pd.api.types.is_numeric_dtype(ml_df[col]):
+            ml_df[col] = ml_df[col].fillna(0)
+        else:
+            ml_df[col] = LabelEncoder().fit_transform(ml_df[col].astype(object).fillna('Unknown').astype(str))
+    return df, ml_df
+
+
+def compact_path(data_path):
+    """Carga compacta + reaproveitamento dos códigos de category"""
+    df = load_compact(data_path)
+    X, _ = build_feature_matrix(df)
+    return df, X
+
+
+def _measure_in_child(name, data_path):
+    """Executa um caminho em processo próprio: o pico de RSS não é contaminado pelo outro"""
+    func = {'original': original_path, 'compacto': compact_path}[name]
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    df, X = func(data_path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux
+    return (peak - base) / 1e3, df.memory_usage(deep=True).sum() / 1e6, X.memory_usage(deep=True).sum() / 1e6
+
+
+def measure(name, data_path):
+    """Pico de memória (MB) acima do baseline do processo e tamanho final do frame"""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_measure_in_child, (name, data_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    args = parser.parse_args()
+    
+    print(f"📊 Dataset: {args.data}")
+    for name in ['original', 'compacto']:
+        peak, frame, features = measure(name, args.data)
+        print(f"  {name:>9}: pico {peak:8.1f} MB | frame {frame:8.1f} MB | features ML {features:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark do scoring de leads
+Compara o scoring linha a linha (apply) com o scoring vetorizado
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from scoring_model import LeadScorer
+
+
+def load_leads(data_path, replicas):
+    """Carrega o dataset e replica para simular volumes maiores"""
+    df = pd.read_csv(data_path)
+    if replicas > 1:
+        df = pd.concat([df] * replicas, ignore_index=True)
+    return df
+
+
+def run(df, repeat):
+    """Mede rows/s dos dois caminhos e confere se os scores são idênticos"""
+    scorer = LeadScorer()
+    
+    start = time.perf_counter()
+    row_scores = df.apply(scorer.calculate_business_score, axis=1)
+    row_priorities = row_scores.apply(scorer.get_priority)
+    row_time = time.perf_counter() - start
+    
+    vec_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vec_scores = scorer.calculate_scores(df)
+        vec_priorities = scorer.get_priorities(vec_scores)
+        vec_time = min(vec_time, time.perf_counter() - start)
+    
+    assert (row_scores.to_numpy() == vec_scores.to_numpy()).all(), 'Scores divergentes'
+    assert (row_priorities.to_numpy() == vec_priorities.to_numpy()).all(), 'Prioridades divergentes'
+    
+    print(f"📊 Leads: {len(df):,}")
+    print(f"  🐢 apply (linha a linha): {row_time:.3f}s ({len(df) / row_time:,.0f} rows/s)")
+    print(f"  🚀 vetorizado:            {vec_time:.3f}s ({len(df) / vec_time:,.0f} rows/s)")
+    print(f"  ⚡ Speedup: {row_time / vec_time:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    parser.add_argument('--replicas', type=int, default=10,
+                        help='Quantas vezes replicar o dataset')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetições do caminho vetorizado (melhor tempo)')
+    args = parser.parse_args()
+    
+    run(load_leads(args.data, args.replicas), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark do scoring em shards
+Mede rows/s do scoring multi-core com 1, 2, 4... processos e confere que a
+saída é idêntica à do pipeline em streaming de um processo
+"""
+
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from streaming import parallel_score_csv, stream_score_csv
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = func(*args, **kwargs)
+    return stats, time.perf_counter() - start
+
+
+def run(data_path, max_workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = os.path.join(tmp, 'stream')
+        stats, base_time = timed(stream_score_csv, data_path, base_dir)
+        rows = stats['rows']
+        print(f"📊 Leads: {rows:,} | CPUs: {os.cpu_count()}")
+        print(f"  streaming (1 processo): {base_time:7.2f}s ({rows / base_time:>12,.0f} rows/s)")
+
+        workers = 1
+        while workers <= max_workers:
+            out_dir = os.path.join(tmp, f'shards_{workers}')
+            _, elapsed = timed(parallel_score_csv, data_path, out_dir, workers)
+            identical = all(filecmp.cmp(os.path.join(base_dir, name), os.path.join(out_dir, name), shallow=False)
+                            for name in ('leads_with_scores.csv', 'promising_leads.csv'))
+            print(f"  shards, {workers:>2} processos:   {elapsed:7.2f}s ({rows / elapsed:>12,.0f} rows/s) "
+                  f"| speedup {base_time / elapsed:4.1f}x | {'✅ idêntico' if identical else '❌ DIVERGENTE'}")
+            workers *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv',
+                        help='CSV grande (ex.: python src/synthetic.py 10000000)')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    run(args.data, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Suíte de benchmarks em escala
+Gera (ou reaproveita) datasets sintéticos de cada tamanho e mede, por etapa,
+throughput, latência, tempo de CPU e pico de memória. Cada tamanho roda em um
+processo próprio; o resultado vai para benchmarks/results/<commit>.json e pode
+ser comparado com o de outro commit (--compare).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, ROOT_DIR)
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+STAGES = ['load', 'create_lead_score', 'score_latency', 'train_ml_model', 'charts']
+
+
+def run_stages(data_path, stages, latency_samples=10_000):
+    """Executa as etapas pedidas sobre um dataset (chamado no processo filho)"""
+    import numpy as np
+
+    from gerar_graficos import generate_charts
+    from lead_scoring_analysis import LeadScoringAnalysis
+    from profiling import StageProfiler
+    from scoring_model import LeadScorer
+
+    profiler = StageProfiler()
+    latency = None
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as tmp, quiet:
+        # A carga é sempre necessária para as demais etapas
+        with profiler.stage('load') as stage:
+            analyzer = LeadScoringAnalysis(data_path)
+            stage.rows_out = rows = len(analyzer.df)
+
+        if 'create_lead_score' in stages or 'charts' in stages:
+            with profiler.stage('create_lead_score', rows_in=rows) as stage:
+                stage.rows_out = len(analyzer.create_lead_score())
+
+        if 'score_latency' in stages:
+            scorer = LeadScorer()
+            sample = analyzer.df.sample(min(latency_samples, rows), random_state=42)
+            leads = sample[scorer.rules.input_columns].to_dict('records')
+            with profiler.stage('score_latency', rows_in=len(leads)) as stage:
+                timings = []
+                for lead in leads:
+                    start = time.perf_counter()
+                    scorer.get_priority(scorer.calculate_business_score(lead))
+                    timings.append(time.perf_counter() - start)
+                stage.rows_out = len(leads)
+            latency = {f'p{q}_us': float(np.percentile(timings, q) * 1e6) for q in (50, 90, 99)}
+
+        if 'train_ml_model' in stages:
+            with profiler.stage('train_ml_model', rows_in=rows):
+                analyzer.train_ml_model(force=True, models_dir=os.path.join(tmp, 'models'))
+
+        if 'charts' in stages:
+            with profiler.stage('charts', rows_in=rows):
+                generate_charts(df=analyzer.df, preview=True, force=True, output_dir=os.path.join(tmp, 'charts'))
+
+    report = profiler.report()
+    for stage in report['stages']:
+        rows_in = stage['rows_in'] or stage['rows_out'] or 0
+        stage['rows_per_second'] = rows_in / stage['wall_seconds'] if stage['wall_seconds'] else None
+    report['rows'] = rows
+    report['score_latency'] = latency
+    return report
+
+
+def run_size(n, stages, fmt):
+    """Um tamanho em um processo próprio (pico de RSS não contaminado por outros tamanhos)"""
+    from synthetic import write_synthetic
+
+    data_path = write_synthetic(n, fmt)
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', data_path, '--stages', *stages]
+    result = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark com {n:,} linhas falhou:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    return git('rev-parse', '--short', 'HEAD') or 'unknown', bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def machine_info():
+    import numpy
+    import pandas
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def print_report(result):
+    print(f"\n📊 {result['rows']:,} leads")
+    for stage in result['stages']:
+        rate = f"{stage['rows_per_second']:>14,.0f} rows/s" if stage['rows_per_second'] else ''
+        print(f"  {stage['stage']:<18} {stage['wall_seconds']:8.2f}s | CPU {stage['cpu_seconds']:8.2f}s | "
+              f"pico {stage['peak_rss_mb']:8,.0f} MB | {rate}")
+    if result['score_latency']:
+        lat = result['score_latency']
+        print(f"  ⚡ latência 1 lead: p50 {lat['p50_us']:.1f}µs | p90 {lat['p90_us']:.1f}µs | p99 {lat['p99_us']:.1f}µs")
+
+
+def compare(current, baseline):
+    """Razão de tempo (atual / baseline) por tamanho e etapa"""
+    base = {(r['rows'], s['stage']): s for r in baseline['results'] for s in r['stages']}
+    print(f"\n🔀 Comparação com {baseline['commit']} (tempo atual / baseline; < 1 = mais rápido)")
+    for result in current['results']:
+        for stage in result['stages']:
+            old = base.get((result['rows'], stage['stage']))
+            if old and old['wall_seconds']:
+                ratio = stage['wall_seconds'] / old['wall_seconds']
+                mem = stage['peak_rss_mb'] - old['peak_rss_mb']
+                flag = '🔴' if ratio > 1.1 else '🟢' if ratio < 0.9 else '⚪'
+                print(f"  {flag} {result['rows']:>12,} {stage['stage']:<18} {ratio:5.2f}x tempo | {mem:+8,.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet')
+    parser.add_argument('--output', help='Padrão: benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', help='Resultado de outro commit para comparação')
+    parser.add_argument('--worker', metavar='DATA', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_stages(args.worker, args.stages)))
+        return
+
+    baseline = None
+    if args.compare:
+        # Lido antes de rodar: a saída pode sobrescrever o mesmo arquivo
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    commit, dirty = git_commit()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'format': args.format,
+        'results': [],
+    }
+    for n in args.rows:
+        result = run_size(n, args.stages, args.format)
+        report['results'].append(result)
+        print_report(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados: {output}")
+
+    if baseline is not None:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de treino do Random Forest
+Tempo de fit por número de núcleos e por número de árvores, e parada antecipada
+pelo AUC out-of-bag, no dataset replicado até --rows linhas.
+Com linhas replicadas o AUC OOB fica otimista; o foco aqui é o tempo.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from lead_scoring_analysis import ML_FEATURES, build_feature_matrix
+from storage import load_compact
+from training import fit_forest_early_stopping
+
+
+def build_matrix(data_path, rows):
+    """Codifica as features uma vez e replica até o número de linhas pedido"""
+    df = load_compact(data_path, columns=ML_FEATURES + ['Converted'])
+    X, _ = build_feature_matrix(df)
+    X = X.to_numpy(dtype=np.float32)
+    y = df['Converted'].to_numpy()
+    reps = int(np.ceil(rows / len(X)))
+    return np.tile(X, (reps, 1))[:rows], np.tile(y, reps)[:rows]
+
+
+def time_fit(X, y, n_estimators, n_jobs):
+    model = RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs, random_state=42)
+    start = time.perf_counter()
+    model.fit(X, y)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--trees', type=int, nargs='*', default=[25, 50, 100, 200])
+    parser.add_argument('--cores', type=int, nargs='*',
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    
+    X, y = build_matrix(args.data, args.rows)
+    print(f"📊 Matriz: {X.shape[0]:,} linhas x {X.shape[1]} features ({os.cpu_count()} núcleos)")
+    
+    base_trees = args.trees[0]
+    print(f"\n⚙️ Fit x núcleos ({base_trees} árvores):")
+    baseline = None
+    for cores in [c for c in args.cores if c <= (os.cpu_count() or 1)]:
+        elapsed = time_fit(X, y, base_trees, cores)
+        baseline = baseline or elapsed
+        print(f"  {cores:>3} núcleo(s): {elapsed:7.2f}s (speedup {baseline / elapsed:.1f}x)")
+    
+    print(f"\n🌲 Fit x árvores (todos os núcleos):")
+    for trees in args.trees:
+        elapsed = time_fit(X, y, trees, -1)
+        print(f"  {trees:>4} árvores: {elapsed:7.2f}s")
+    
+    print(f"\n⏹️ Parada antecipada (AUC OOB):")
+    start = time.perf_counter()
+    model, history = fit_forest_early_stopping(X, y, max_trees=max(args.trees))
+    for n_trees, auc, elapsed in history:
+        print(f"  {n_trees:>4} árvores: AUC OOB {auc:.4f} ({elapsed:.2f}s)")
+    print(f"  ✅ {len(model.estimators_)} árvores em {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
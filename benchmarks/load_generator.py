@@ -0,0 +1,80 @@
+"""
+Gerador de carga para o serviço de scoring
+Dispara requisições concorrentes com leads reais e mede latência (p50/p95/p99)
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+LEAD_COLUMNS = [
+    'Lead Source', 'Total Time Spent on Website', 'Last Activity', 'TotalVisits',
+    'Lead Quality', 'Page Views Per Visit', 'Lead Origin'
+]
+
+
+def load_payloads(data_path, batch_size, n):
+    """Monta n corpos JSON a partir de leads amostrados do dataset"""
+    df = pd.read_csv(data_path, usecols=LEAD_COLUMNS)
+    records = json.loads(df.to_json(orient='records'))
+    rng = np.random.default_rng(42)
+    payloads = []
+    for _ in range(n):
+        idx = rng.integers(0, len(records), batch_size)
+        leads = [records[i] for i in idx]
+        payloads.append(json.dumps(leads[0] if batch_size == 1 else leads).encode('utf-8'))
+    return payloads
+
+
+def worker(host, port, payloads, latencies):
+    """Cliente com conexão persistente (keep-alive)"""
+    conn = http.client.HTTPConnection(host, port)
+    headers = {'Content-Type': 'application/json'}
+    for body in payloads:
+        start = time.perf_counter()
+        conn.request('POST', '/score', body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"Status {response.status}")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data', default='data/Lead_Scoring.csv')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=1, help='Leads por requisição')
+    args = parser.parse_args()
+    
+    payloads = load_payloads(args.data, args.batch_size, args.requests)
+    per_worker = [payloads[i::args.concurrency] for i in range(args.concurrency)]
+    latencies = []
+    threads = [threading.Thread(target=worker, args=(args.host, args.port, p, latencies))
+               for p in per_worker]
+    
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    
+    lat_ms = np.asarray(latencies) * 1000
+    print(f"📊 {len(lat_ms):,} requisições ({args.batch_size} lead(s) cada), concorrência {args.concurrency}")
+    print(f"  ⚡ Throughput: {len(lat_ms) / elapsed:,.0f} req/s ({len(lat_ms) * args.batch_size / elapsed:,.0f} leads/s)")
+    for p in (50, 95, 99):
+        print(f"  ⏱️ p{p}: {np.percentile(lat_ms, p):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
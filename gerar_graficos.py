@@ -1,118 +1,224 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+"""
+Geração das Visualizações
+Agrega os dados uma vez e renderiza os gráficos em paralelo (um processo por
+gráfico). Gráficos cujo agregado não mudou não são redesenhados.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from plot_data import CORR_COLS, aggregate_file, aggregate_frame
+
+OUTPUT_DIR = 'images/visualizations'
+PREVIEW_DIR = 'images/preview'
+CACHE_FILE = '.chart_cache.json'
+DPI = 300
+PREVIEW_DPI = 72
+
+CHART_COLUMNS = ['Lead Source', 'Converted', 'TotalVisits', 'Total Time Spent on Website',
+                 'Page Views Per Visit', 'Last Activity', 'Lead Quality']
+
+
+def compute_aggregates(df=None, data_path=None, batch_size=500_000, sample_size=0):
+    """
+    Agregados pequenos (independentes do nº de leads) que alimentam cada gráfico.
+    Sem df, o arquivo é lido em blocos de batch_size linhas.
+    """
+    if df is not None:
+        data = aggregate_frame(df, sample_size=sample_size)
+    else:
+        data = aggregate_file(data_path, CHART_COLUMNS, batch_size, sample_size=sample_size)
+
+    return {
+        'conversao_por_fonte': {
+            'source_conv': data['source_conv']['Taxa_Conversao'],
+        },
+        'tempo_no_site': {
+            'edges': data['time_edges'],
+            'hist': data['time_density'],
+            'conv_mean': data['time_mean'][1],
+            'not_conv_mean': data['time_mean'][0],
+        },
+        'lead_score_distribution': {
+            'counts': data['score_counts'],
+            'edges': data['score_edges'],
+            'mean_score': data['score_mean'],
+        },
+        'matriz_correlacao': {
+            # Com amostra, a correlação vem da amostra estratificada
+            'corr': data['sample'][CORR_COLS].corr() if sample_size else data['corr'],
+        },
+    }
+
+
+def _hist_from_counts(plt, counts, edges, **kwargs):
+    """Desenha um histograma já agregado (mesmo visual de plt.hist)"""
+    return plt.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
 
-print('📊 Gerando visualizações...')
-
-# Carregar dados
-df = pd.read_csv('data/Lead_Scoring.csv')
-
-# Configurar estilo
-plt.style.use('default')
-sns.set_palette('husl')
 
 # 1. GRÁFICO: Conversão por Fonte
-plt.figure(figsize=(12, 6))
-source_conv = df.groupby('Lead Source')['Converted'].agg(['count', 'mean']).reset_index()
-source_conv = source_conv[source_conv['count'] >= 50].sort_values('mean', ascending=False)
-
-bars = plt.bar(range(len(source_conv)), source_conv['mean'], color='skyblue', edgecolor='navy', alpha=0.7)
-plt.title('📈 Taxa de Conversão por Fonte de Lead', fontsize=16, fontweight='bold', pad=20)
-plt.xticks(range(len(source_conv)), source_conv['Lead Source'], rotation=45, ha='right')
-plt.ylabel('Taxa de Conversão', fontsize=12)
-plt.ylim(0, 1)
-
-# Adicionar valores nas barras
-for i, bar in enumerate(bars):
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height + 0.01, 
-             f'{height:.1%}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('images/visualizations/conversao_por_fonte.png', dpi=300, bbox_inches='tight')
-plt.close()
-print('✅ Gráfico 1 salvo: conversao_por_fonte.png')
+def plot_conversao_por_fonte(plt, sns, agg):
+    source_conv = agg['source_conv']
+    plt.figure(figsize=(12, 6))
+    bars = plt.bar(range(len(source_conv)), source_conv.values, color='skyblue', edgecolor='navy', alpha=0.7)
+    plt.title('📈 Taxa de Conversão por Fonte de Lead', fontsize=16, fontweight='bold', pad=20)
+    plt.xticks(range(len(source_conv)), source_conv.index, rotation=45, ha='right')
+    plt.ylabel('Taxa de Conversão', fontsize=12)
+    plt.ylim(0, 1)
+
+    # Adicionar valores nas barras
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.01,
+                 f'{height:.1%}', ha='center', va='bottom', fontweight='bold')
+
 
 # 2. GRÁFICO: Distribuição de Tempo no Site
-plt.figure(figsize=(12, 6))
-converted = df[df['Converted']==1]['Total Time Spent on Website'].dropna()
-not_converted = df[df['Converted']==0]['Total Time Spent on Website'].dropna()
-
-plt.hist(not_converted, bins=50, alpha=0.7, label='Não Convertidos', color='lightcoral', density=True)
-plt.hist(converted, bins=50, alpha=0.7, label='Convertidos', color='lightgreen', density=True)
-
-plt.title('⏱️ Distribuição: Tempo Gasto no Site', fontsize=16, fontweight='bold', pad=20)
-plt.xlabel('Tempo no Site (segundos)', fontsize=12)
-plt.ylabel('Densidade', fontsize=12)
-plt.legend(fontsize=12)
-plt.grid(True, alpha=0.3)
-
-# Adicionar médias
-conv_mean = converted.mean()
-not_conv_mean = not_converted.mean()
-plt.axvline(conv_mean, color='green', linestyle='--', alpha=0.8, label=f'Média Convertidos: {conv_mean:.0f}s')
-plt.axvline(not_conv_mean, color='red', linestyle='--', alpha=0.8, label=f'Média Não Convertidos: {not_conv_mean:.0f}s')
-plt.legend()
-
-plt.tight_layout()
-plt.savefig('images/visualizations/tempo_no_site.png', dpi=300, bbox_inches='tight')
-plt.close()
-print('✅ Gráfico 2 salvo: tempo_no_site.png')
+def plot_tempo_no_site(plt, sns, agg):
+    plt.figure(figsize=(12, 6))
+    _hist_from_counts(plt, agg['hist']['not_converted'], agg['edges'], alpha=0.7,
+                      label='Não Convertidos', color='lightcoral')
+    _hist_from_counts(plt, agg['hist']['converted'], agg['edges'], alpha=0.7,
+                      label='Convertidos', color='lightgreen')
+
+    plt.title('⏱️ Distribuição: Tempo Gasto no Site', fontsize=16, fontweight='bold', pad=20)
+    plt.xlabel('Tempo no Site (segundos)', fontsize=12)
+    plt.ylabel('Densidade', fontsize=12)
+    plt.grid(True, alpha=0.3)
+
+    # Adicionar médias
+    conv_mean, not_conv_mean = agg['conv_mean'], agg['not_conv_mean']
+    plt.axvline(conv_mean, color='green', linestyle='--', alpha=0.8, label=f'Média Convertidos: {conv_mean:.0f}s')
+    plt.axvline(not_conv_mean, color='red', linestyle='--', alpha=0.8, label=f'Média Não Convertidos: {not_conv_mean:.0f}s')
+    plt.legend()
+
 
 # 3. GRÁFICO: Lead Score Distribution
-# Aplicar scoring primeiro
-def calculate_lead_score(row):
-    score = 0
-    source_scores = {'Welingak Website': 40, 'Reference': 35, 'Google': 20, 'Organic Search': 15, 'Direct Traffic': 10, 'Olark Chat': 5}
-    score += source_scores.get(row.get('Lead Source', ''), 0)
-    
-    time_spent = row.get('Total Time Spent on Website', 0) or 0
-    if time_spent > 1000: score += 20
-    elif time_spent > 500: score += 15
-    elif time_spent > 200: score += 10
-    elif time_spent > 0: score += 5
-    
-    return min(score, 100)
-
-df['Lead_Score'] = df.apply(calculate_lead_score, axis=1)
-
-plt.figure(figsize=(12, 6))
-plt.hist(df['Lead_Score'], bins=20, edgecolor='black', alpha=0.7, color='lightblue')
-plt.title('🎯 Distribuição dos Lead Scores', fontsize=16, fontweight='bold', pad=20)
-plt.xlabel('Lead Score (0-100)', fontsize=12)
-plt.ylabel('Número de Leads', fontsize=12)
-plt.grid(True, alpha=0.3)
-
-# Adicionar linhas de corte
-plt.axvline(70, color='red', linestyle='--', alpha=0.8, label='Alta Prioridade (70+)')
-plt.axvline(50, color='orange', linestyle='--', alpha=0.8, label='Média Prioridade (50+)')
-plt.axvline(30, color='yellow', linestyle='--', alpha=0.8, label='Baixa Prioridade (30+)')
-plt.legend()
-
-# Estatísticas
-mean_score = df['Lead_Score'].mean()
-plt.text(0.7, 0.8, f'Score Médio: {mean_score:.1f}', transform=plt.gca().transAxes, 
-         bbox=dict(boxstyle='round', facecolor='white', alpha=0.8), fontsize=12)
-
-plt.tight_layout()
-plt.savefig('images/visualizations/lead_score_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-print('✅ Gráfico 3 salvo: lead_score_distribution.png')
+def plot_lead_score_distribution(plt, sns, agg):
+    plt.figure(figsize=(12, 6))
+    _hist_from_counts(plt, agg['counts'], agg['edges'], edgecolor='black', alpha=0.7, color='lightblue')
+    plt.title('🎯 Distribuição dos Lead Scores', fontsize=16, fontweight='bold', pad=20)
+    plt.xlabel('Lead Score (0-100)', fontsize=12)
+    plt.ylabel('Número de Leads', fontsize=12)
+    plt.grid(True, alpha=0.3)
+
+    # Adicionar linhas de corte
+    plt.axvline(70, color='red', linestyle='--', alpha=0.8, label='Alta Prioridade (70+)')
+    plt.axvline(50, color='orange', linestyle='--', alpha=0.8, label='Média Prioridade (50+)')
+    plt.axvline(30, color='yellow', linestyle='--', alpha=0.8, label='Baixa Prioridade (30+)')
+    plt.legend()
+
+    # Estatísticas
+    plt.text(0.7, 0.8, f"Score Médio: {agg['mean_score']:.1f}", transform=plt.gca().transAxes,
+             bbox=dict(boxstyle='round', facecolor='white', alpha=0.8), fontsize=12)
+
 
 # 4. GRÁFICO: Matriz de Correlação (variáveis numéricas)
-plt.figure(figsize=(10, 8))
-numeric_cols = ['TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit', 'Converted', 'Lead_Score']
-correlation_matrix = df[numeric_cols].corr()
-
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0, 
-            square=True, cbar_kws={'shrink': 0.8})
-plt.title('🔥 Matriz de Correlação - Variáveis Numéricas', fontsize=16, fontweight='bold', pad=20)
-plt.tight_layout()
-plt.savefig('images/visualizations/matriz_correlacao.png', dpi=300, bbox_inches='tight')
-plt.close()
-print('✅ Gráfico 4 salvo: matriz_correlacao.png')
-
-print('\\n🎉 TODAS AS VISUALIZAÇÕES FORAM CRIADAS!')
-print('📁 Localização: images/visualizations/')
-print('🔄 Pronto para o próximo passo!')
+def plot_matriz_correlacao(plt, sns, agg):
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(agg['corr'], annot=True, cmap='coolwarm', center=0,
+                square=True, cbar_kws={'shrink': 0.8})
+    plt.title('🔥 Matriz de Correlação - Variáveis Numéricas', fontsize=16, fontweight='bold', pad=20)
+
+
+CHARTS = {
+    'conversao_por_fonte': plot_conversao_por_fonte,
+    'tempo_no_site': plot_tempo_no_site,
+    'lead_score_distribution': plot_lead_score_distribution,
+    'matriz_correlacao': plot_matriz_correlacao,
+}
+
+
+def render_chart(name, agg, path, dpi):
+    """Renderiza um gráfico (executado em um processo do pool)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Configurar estilo
+    plt.style.use('default')
+    sns.set_palette('husl')
+
+    CHARTS[name](plt, sns, agg)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close('all')
+    return path
+
+
+def _aggregate_hash(agg, dpi):
+    return hashlib.sha256(pickle.dumps((agg, dpi))).hexdigest()
+
+
+def generate_charts(df=None, data_path=None, preview=False, workers=None, force=False, output_dir=None,
+                    batch_size=500_000, sample_size=0):
+    """
+    Gera os gráficos a partir dos agregados.
+    preview: baixa resolução em images/preview/ (não sobrescreve os finais).
+    force: redesenha mesmo que o agregado não tenha mudado.
+    sample_size: usa uma amostra estratificada por Converted na matriz de correlação.
+    """
+    print('📊 Gerando visualizações...')
+    aggregates = compute_aggregates(df, data_path, batch_size, sample_size)
+
+    dpi = PREVIEW_DPI if preview else DPI
+    output_dir = output_dir or (PREVIEW_DIR if preview else OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+
+    jobs = {}
+    for i, name in enumerate(CHARTS, start=1):
+        path = os.path.join(output_dir, f'{name}.png')
+        digest = _aggregate_hash(aggregates[name], dpi)
+        if not force and cache.get(name) == digest and os.path.exists(path):
+            print(f'♻️ Gráfico {i} inalterado: {name}.png')
+            continue
+        jobs[name] = (i, path, digest)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+            futures = {name: pool.submit(render_chart, name, aggregates[name], path, dpi)
+                       for name, (_, path, _) in jobs.items()}
+            for name, future in futures.items():
+                future.result()
+                i, _, digest = jobs[name]
+                cache[name] = digest
+                print(f'✅ Gráfico {i} salvo: {name}.png')
+
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+    print('\n🎉 TODAS AS VISUALIZAÇÕES FORAM CRIADAS!')
+    print(f'📁 Localização: {output_dir}/')
+    return [os.path.join(output_dir, f'{name}.png') for name in CHARTS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=None)
+    parser.add_argument('--preview', action='store_true', help=f'Baixa resolução ({PREVIEW_DPI} dpi) em {PREVIEW_DIR}/')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='Redesenha todos os gráficos')
+    parser.add_argument('--batch-size', type=int, default=500_000, help='Linhas lidas por bloco')
+    parser.add_argument('--sample', type=int, default=0, help='Tamanho da amostra estratificada (0 = todos)')
+    args = parser.parse_args()
+
+    generate_charts(data_path=args.data, preview=args.preview, workers=args.workers, force=args.force,
+                    batch_size=args.batch_size, sample_size=args.sample)
+    print('🔄 Pronto para o próximo passo!')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Lead Scoring - linha de comando única
+
+  python src/cli.py score --lead '{"Lead Source": "Google", "TotalVisits": 3}'
+  python src/cli.py score --file data/Lead_Scoring.csv
+  python src/cli.py top --k 20 --by City
+  python src/cli.py analyze
+  python src/cli.py train --force
+  python src/cli.py charts --preview
+  python src/cli.py ingest simulate --rate 5000
+
+Cada subcomando importa só o que usa: scorar leads avulsos não carrega
+pandas, scikit-learn nem matplotlib.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from ingestion import add_arguments as add_ingest_arguments
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def cmd_score(args):
+    """Leads avulsos (JSON) com as regras puras; arquivos com o caminho vetorizado"""
+    if args.file:
+        if args.file.endswith('.csv') and args.workers:
+            from streaming import parallel_score_csv
+            parallel_score_csv(args.file, args.output_dir, args.workers, min_score=args.min_score)
+        elif args.file.endswith('.csv'):
+            from streaming import stream_score_csv
+            stream_score_csv(args.file, args.output_dir, min_score=args.min_score)
+        else:
+            from scoring_model import LeadScorer
+            leads = LeadScorer().score_file(args.file)
+            os.makedirs(args.output_dir, exist_ok=True)
+            path = os.path.join(args.output_dir, 'leads_with_scores.csv')
+            leads.to_csv(path, index=False)
+            print(f"💾 {len(leads):,} leads pontuados: {path}")
+        return
+
+    from scoring_rules import default_rules
+
+    rules = default_rules()
+    lines = args.lead or [line for line in sys.stdin if line.strip()]
+    for line in lines:
+        lead = json.loads(line)
+        for item in lead if isinstance(lead, list) else [lead]:
+            score = rules.score_one(item)
+            print(json.dumps({'Lead_Score': score, 'Prioridade': rules.priority_one(score)}, ensure_ascii=False))
+
+
+def cmd_top(args):
+    """Lista de contato: os K leads abertos de maior score (por grupo com --by)"""
+    from scoring_model import LeadScorer
+
+    leads = LeadScorer().promising_leads(args.data, args.min_score, top_n=args.k, by=args.by,
+                                         extra_columns=['Lead Number', 'Lead Source', 'Last Activity'])
+    if args.output:
+        leads.to_csv(args.output, index=False)
+        print(f"💾 {len(leads):,} leads: {args.output}")
+    else:
+        columns = list(dict.fromkeys(([args.by] if args.by else []) +
+                                     ['Lead Number', 'Lead_Score', 'Prioridade', 'Lead Source', 'Last Activity']))
+        print(leads[columns].to_string(index=False))
+
+
+def cmd_analyze(args):
+    from lead_scoring_analysis import main as run_analysis
+    from profiling import StageProfiler
+    run_analysis(args.data, StageProfiler(profile_dir=args.cprofile_dir), args.metrics_json, args.metrics_prom)
+
+
+def cmd_train(args):
+    from lead_scoring_analysis import LeadScoringAnalysis
+    from storage import default_data_path
+
+    analyzer = LeadScoringAnalysis(args.data or default_data_path())
+    analyzer.train_ml_model(force=args.force, early_stopping=args.early_stopping)
+
+
+def cmd_charts(args):
+    sys.path.insert(0, ROOT_DIR)
+    from gerar_graficos import generate_charts
+    generate_charts(data_path=args.data, preview=args.preview, workers=args.workers, force=args.force)
+
+
+def cmd_ingest(args):
+    from ingestion import run
+    run(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score = commands.add_parser('score', help='Aplica o Lead Score (JSON em --lead/stdin ou --file)')
+    score.add_argument('--lead', action='append', help='Lead em JSON (objeto ou lista); pode repetir')
+    score.add_argument('--file', help='CSV ou dataset Parquet')
+    score.add_argument('--output-dir', default='data/processed')
+    score.add_argument('--min-score', type=int, default=60)
+    score.add_argument('--workers', type=int, default=None, help='CSV em shards com N processos')
+    score.set_defaults(func=cmd_score)
+
+    top = commands.add_parser('top', help='Top K leads não convertidos (geral ou por grupo)')
+    top.add_argument('--data', default=None, help='CSV ou dataset Parquet')
+    top.add_argument('--k', type=int, default=10)
+    top.add_argument('--by', help='Top K por grupo, ex.: City, Lead Source')
+    top.add_argument('--min-score', type=int, default=0)
+    top.add_argument('--output', help='Grava em CSV em vez de imprimir')
+    top.set_defaults(func=cmd_top)
+
+    analyze = commands.add_parser('analyze', help='Análise completa')
+    analyze.add_argument('--data', default=None)
+    analyze.add_argument('--metrics-json', help='Relatório por etapa em JSON')
+    analyze.add_argument('--metrics-prom', help='Relatório por etapa no formato textfile do Prometheus')
+    analyze.add_argument('--cprofile-dir', help='Grava um cProfile (.prof) por etapa')
+    analyze.set_defaults(func=cmd_analyze)
+
+    train = commands.add_parser('train', help='Treina (ou reaproveita) o modelo ML')
+    train.add_argument('--data', default=None)
+    train.add_argument('--force', action='store_true', help='Retreina mesmo com dados inalterados')
+    train.add_argument('--early-stopping', action='store_true')
+    train.set_defaults(func=cmd_train)
+
+    charts = commands.add_parser('charts', help='Gera as visualizações')
+    charts.add_argument('--data', default=None)
+    charts.add_argument('--preview', action='store_true')
+    charts.add_argument('--workers', type=int, default=None)
+    charts.add_argument('--force', action='store_true')
+    charts.set_defaults(func=cmd_charts)
+
+    ingest = commands.add_parser('ingest', help='Ingestão contínua (stdin, diretório ou produtor simulado)')
+    add_ingest_arguments(ingest)
+    ingest.set_defaults(func=cmd_ingest)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Scoring Incremental
+Re-pontua apenas leads novos ou alterados desde a última execução, a partir de
+um estado persistido (Lead Number -> hash das entradas, score e prioridade)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring_model import LeadScorer
+from storage import default_data_path, read_leads
+
+STATE_PATH = 'data/processed/score_state.parquet'
+KEY = 'Lead Number'
+
+
+def input_hashes(df, columns):
+    """Hash (uint64) por lead das colunas usadas no scoring, independente do dtype de leitura"""
+    normalized = pd.DataFrame(index=df.index)
+    for col in columns:
+        values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+        if pd.api.types.is_numeric_dtype(values):
+            normalized[col] = values.astype('float64')
+        else:
+            normalized[col] = values.astype(object)
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def rules_hash(scorer):
+    """Hash das regras: se mudarem, todo o estado é invalidado"""
+    spec = json.dumps(scorer.rules.rules.to_dict(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+class IncrementalScorer:
+    """LeadScorer com estado persistido entre execuções"""
+
+    def __init__(self, scorer=None, state_path=STATE_PATH):
+        self.scorer = scorer or LeadScorer()
+        self.state_path = state_path
+        self.meta_path = os.path.splitext(state_path)[0] + '.json'
+
+    def load_state(self):
+        """Estado anterior (vazio se não existir ou se as regras mudaram)"""
+        empty = pd.DataFrame({KEY: pd.Series(dtype='int64'), 'input_hash': pd.Series(dtype='uint64'),
+                              'Lead_Score': pd.Series(dtype='int64'), 'Prioridade': pd.Series(dtype=object)})
+        if not os.path.exists(self.state_path) or not os.path.exists(self.meta_path):
+            return empty
+        with open(self.meta_path, encoding='utf-8') as f:
+            if json.load(f).get('rules_hash') != rules_hash(self.scorer):
+                print("⚠️ Regras de scoring mudaram: todos os leads serão re-pontuados")
+                return empty
+        # Lead Number repetido quebraria o get_indexer: vale a última ocorrência
+        return pd.read_parquet(self.state_path).drop_duplicates(KEY, keep='last', ignore_index=True)
+
+    def save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        state = state.drop_duplicates(KEY, keep='last', ignore_index=True)
+        state.to_parquet(self.state_path, index=False)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'rules_hash': rules_hash(self.scorer), 'leads': len(state)}, f)
+
+    def score(self, leads_df):
+        """
+        Aplica o scoring só nas linhas novas/alteradas e reaproveita o estado
+        nas demais. Retorna (leads com score, transições de prioridade).
+        """
+        hashes = input_hashes(leads_df, self.scorer.rules.input_columns)
+        state = self.load_state()
+
+        # Posição de cada lead no estado anterior (-1 = lead novo)
+        keys = leads_df[KEY].to_numpy()
+        pos = pd.Index(state[KEY]).get_indexer(keys)
+        is_new = pos < 0
+        take = np.where(is_new, 0, pos)
+
+        def previous(col, fill):
+            values = state[col].to_numpy()
+            if not len(values):
+                return np.full(len(keys), fill, dtype=object if fill is None else type(fill))
+            return np.where(is_new, fill, values[take])
+
+        prev_hash = previous('input_hash', np.uint64(0)).astype('uint64')
+        prev_score = previous('Lead_Score', np.nan).astype('float64')
+        prev_priority = previous('Prioridade', None).astype(object)
+
+        changed = ~is_new & (prev_hash != hashes)
+        dirty = is_new | changed
+
+        scores = prev_score.copy()
+        priorities = prev_priority.copy()
+        if dirty.any():
+            rescored = self.scorer.score_leads(leads_df.loc[dirty].copy())
+            scores[dirty] = rescored['Lead_Score'].to_numpy()
+            priorities[dirty] = rescored['Prioridade'].to_numpy()
+
+        result = leads_df.copy()
+        result['Lead_Score'] = scores.astype('int64')
+        result['Prioridade'] = priorities
+
+        # Delta: leads novos e leads cuja prioridade mudou
+        moved = changed & (prev_priority != priorities)
+        delta_mask = is_new | moved
+        delta = pd.DataFrame({
+            KEY: keys[delta_mask],
+            'Mudanca': np.where(is_new[delta_mask], 'novo', 'alterado'),
+            'Prioridade_Anterior': prev_priority[delta_mask],
+            'Prioridade': priorities[delta_mask],
+            'Lead_Score_Anterior': prev_score[delta_mask],
+            'Lead_Score': result['Lead_Score'].to_numpy()[delta_mask],
+        })
+
+        self.save_state(pd.DataFrame({
+            KEY: keys,
+            'input_hash': hashes,
+            'Lead_Score': result['Lead_Score'].to_numpy(),
+            'Prioridade': priorities,
+        }))
+        self.last_run = {'leads': len(leads_df), 'new': int(is_new.sum()), 'changed': int(changed.sum()),
+                         'rescored': int(dirty.sum()), 'priority_changes': int(moved.sum())}
+        return result, delta
+
+    def run(self, data_path=None, output_dir='data/processed'):
+        """Executa o scoring incremental e grava o dataset completo e o delta"""
+        result, delta = self.score(read_leads(data_path or default_data_path()))
+
+        os.makedirs(output_dir, exist_ok=True)
+        scores_path = os.path.join(output_dir, 'leads_with_scores.csv')
+        delta_path = os.path.join(output_dir, 'priority_changes.csv')
+        result.to_csv(scores_path, index=False)
+        delta.to_csv(delta_path, index=False)
+
+        stats = self.last_run
+        print(f"📊 {stats['leads']:,} leads | 🆕 {stats['new']:,} novos | 🔄 {stats['changed']:,} alterados")
+        print(f"⚡ Re-pontuados: {stats['rescored']:,} ({stats['rescored'] / max(stats['leads'], 1):.1%})")
+        entered_high = int(((delta['Prioridade'] == 'ALTA') & (delta['Prioridade_Anterior'] != 'ALTA')).sum())
+        print(f"🔥 Entraram em ALTA: {entered_high:,} | Mudanças de prioridade: {stats['priority_changes']:,}")
+        print(f"\n💾 Resultados salvos:")
+        print(f"  📁 {scores_path}")
+        print(f"  📁 {delta_path}")
+        return result, delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('data', nargs='?', default=None)
+    parser.add_argument('--output-dir', default='data/processed')
+    parser.add_argument('--state', default=STATE_PATH)
+    args = parser.parse_args()
+
+    IncrementalScorer(state_path=args.state).run(args.data, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Inferência Rápida
+Random Forest achatada em arrays NumPy (feature, limiar, filhos, probabilidade)
+e encoders como dicionários: predict_proba sem o objeto do scikit-learn, com o
+mesmo resultado
+"""
+
+import json
+import math
+import os
+from functools import cached_property
+
+import numpy as np
+
+FOREST_FILE = 'forest.npz'
+UNKNOWN = 'Unknown'
+
+
+class FeatureEncoder:
+    """
+    Codifica leads (dicts ou DataFrame) na matriz de features do treino.
+    Categorias nulas ou nunca vistas viram 'Unknown' (ou -1 se o treino não
+    teve 'Unknown'); numéricas inválidas ou nulas viram 0.
+    """
+
+    def __init__(self, features, classes):
+        self.features = list(features)
+        self.classes = {col: [str(value) for value in values] for col, values in classes.items()}
+        self.lookup = {col: {value: code for code, value in enumerate(values)}
+                       for col, values in self.classes.items()}
+        self.fallback = {col: lookup.get(UNKNOWN, -1) for col, lookup in self.lookup.items()}
+
+    @classmethod
+    def from_label_encoders(cls, features, le_dict):
+        return cls(features, {col: list(le.classes_) for col, le in le_dict.items()})
+
+    def encode_one(self, lead):
+        """Linha de features de um lead (dict), em Python puro"""
+        row = []
+        for col in self.features:
+            value = lead.get(col)
+            if col in self.lookup:
+                if value is None or (isinstance(value, float) and math.isnan(value)):
+                    value = UNKNOWN
+                row.append(self.lookup[col].get(str(value), self.fallback[col]))
+            else:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = 0.0
+                row.append(0.0 if math.isnan(value) else value)
+        return row
+
+    def encode_frame(self, df):
+        """Matriz float32 de um DataFrame (vetorizado)"""
+        import pandas as pd
+
+        X = np.empty((len(df), len(self.features)), dtype=np.float32)
+        for j, col in enumerate(self.features):
+            values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+            if col in self.lookup:
+                values = values.astype(object).fillna(UNKNOWN).astype(str)
+                codes = pd.Categorical(values, categories=self.classes[col]).codes
+                X[:, j] = np.where(codes < 0, self.fallback[col], codes)
+            else:
+                X[:, j] = pd.to_numeric(values, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        return X
+
+
+class FlatForest:
+    """
+    Todas as árvores concatenadas em arrays planos (filhos = -1 nas folhas).
+    Poucos leads percorrem as árvores em Python puro; lotes maiores avançam
+    todos os pares (árvore, lead) ainda fora de uma folha a cada passo.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'proba', 'roots')
+    # Até aqui o percurso em Python puro é mais rápido que as operações NumPy
+    PYTHON_MAX_ROWS = 4
+
+    def __init__(self, feature, threshold, left, right, proba, roots):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.proba = proba
+        self.roots = roots
+
+    @classmethod
+    def from_sklearn(cls, model):
+        positive = list(model.classes_).index(1) if 1 in model.classes_ else len(model.classes_) - 1
+        parts = {name: [] for name in cls.ARRAYS}
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left == -1
+            parts['feature'].append(np.where(leaf, 0, tree.feature))
+            parts['threshold'].append(tree.threshold)
+            parts['left'].append(np.where(leaf, -1, tree.children_left + offset))
+            parts['right'].append(np.where(leaf, -1, tree.children_right + offset))
+            value = tree.value[:, 0, :]
+            parts['proba'].append(value[:, positive] / value.sum(axis=1))
+            parts['roots'].append([offset])
+            offset += tree.node_count
+        return cls(
+            feature=np.concatenate(parts['feature']).astype(np.int32),
+            threshold=np.concatenate(parts['threshold']).astype(np.float64),
+            left=np.concatenate(parts['left']).astype(np.int32),
+            right=np.concatenate(parts['right']).astype(np.int32),
+            proba=np.concatenate(parts['proba']).astype(np.float64),
+            roots=np.concatenate(parts['roots']).astype(np.int32),
+        )
+
+    @cached_property
+    def _lists(self):
+        return tuple(getattr(self, name).tolist() for name in self.ARRAYS)
+
+    def predict_proba(self, X):
+        """
+        Probabilidade da classe positiva. Mesmo resultado do RandomForest:
+        X em float32 contra limiares em float64 e soma das árvores na ordem.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) <= self.PYTHON_MAX_ROWS:
+            return np.array([self._predict_one(row) for row in X.tolist()], dtype=np.float64)
+
+        n_trees, n = len(self.roots), len(X)
+        leaves = np.repeat(self.roots, n)
+        sample = np.tile(np.arange(n), n_trees)
+        active = np.arange(n_trees * n)
+        node = leaves.copy()
+        while len(active):
+            go_left = X[sample[active], self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            leaves[active] = node
+            # Nó sem filhos: o par (árvore, lead) chegou à folha
+            inner = self.left[node] >= 0
+            active, node = active[inner], node[inner]
+        return self.proba[leaves.reshape(n_trees, n)].sum(axis=0) / n_trees
+
+    def _predict_one(self, row):
+        feature, threshold, left, right, proba, roots = self._lists
+        total = 0.0
+        for node in roots:
+            while left[node] >= 0:
+                node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+            total += proba[node]
+        return total / len(roots)
+
+
+class FastModel:
+    """Encoder + floresta achatada: substitui o modelo do scikit-learn na inferência"""
+
+    def __init__(self, encoder, forest):
+        self.encoder = encoder
+        self.forest = forest
+
+    @classmethod
+    def from_sklearn(cls, model, le_dict, features):
+        return cls(FeatureEncoder.from_label_encoders(features, le_dict), FlatForest.from_sklearn(model))
+
+    def predict_proba(self, leads_df):
+        return self.forest.predict_proba(self.encoder.encode_frame(leads_df))
+
+    def predict_proba_records(self, leads):
+        """Probabilidades de uma lista de dicts, sem montar DataFrame"""
+        return self.forest.predict_proba([self.encoder.encode_one(lead) for lead in leads])
+
+    def save(self, path):
+        """Grava forest.npz no diretório da versão do modelo"""
+        arrays = {name: getattr(self.forest, name) for name in FlatForest.ARRAYS}
+        meta = {'features': self.encoder.features, 'classes': self.encoder.classes}
+        np.savez(os.path.join(path, FOREST_FILE), meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega forest.npz (None se a versão não tiver a floresta exportada)"""
+        file_path = os.path.join(path, FOREST_FILE)
+        if not os.path.exists(file_path):
+            return None
+        with np.load(file_path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {name: data[name] for name in FlatForest.ARRAYS}
+        return cls(FeatureEncoder(meta['features'], meta['classes']), FlatForest(**arrays))
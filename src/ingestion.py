@@ -0,0 +1,450 @@
+"""
+Ingestão Contínua de Leads
+Loop asyncio que lê eventos de lead (fila local, diretório observado ou JSON
+lines no stdin), agrupa em micro-lotes por tamanho ou janela de tempo, pontua
+cada lote com LeadScorer e grava os resultados em segundo plano (write-behind).
+Filas limitadas propagam a pressão: se a gravação ou o scoring atrasam, a
+leitura da fonte espera em vez de acumular memória.
+
+  cat eventos.jsonl | python src/ingestion.py stdin
+  python src/ingestion.py dir data/incoming
+  python src/ingestion.py simulate --rate 5000 --events 100000
+
+asyncio, pandas e numpy são importados só no uso: o cli.py reaproveita
+add_arguments sem pagar por eles.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from model_store import MODELS_DIR, list_versions
+from scoring_model import LeadScorer
+
+EVENTS_PATH = 'data/processed/scored_events.csv'
+MAX_WARNINGS = 10
+_DONE = object()
+
+
+class InvalidEvent:
+    """Linha que não é um lead válido: o pipeline conta, avisa e desvia (dead letter)"""
+
+    def __init__(self, line, error):
+        self.line = line
+        self.error = error
+
+
+def parse_event(line):
+    """
+    Um evento em JSON: um lead (objeto) ou vários (lista); linhas vazias viram [].
+    JSON inválido ou itens que não são objetos viram InvalidEvent em vez de erro.
+    """
+    line = line.strip()
+    if not line:
+        return []
+    try:
+        event = json.loads(line)
+    except ValueError as exc:
+        return [InvalidEvent(line, f'JSON inválido: {exc}')]
+    events = event if isinstance(event, list) else [event]
+    return [lead if isinstance(lead, dict) else InvalidEvent(json.dumps(lead), 'esperado um objeto JSON')
+            for lead in events]
+
+
+async def queue_source(events):
+    """Leads de uma asyncio.Queue local (None encerra a fonte)"""
+    while True:
+        lead = await events.get()
+        if lead is None:
+            return
+        yield lead
+
+
+async def stdin_source(stream=None):
+    """JSON lines do stdin (ou de outro arquivo aberto) até o fim da entrada"""
+    import asyncio
+
+    stream = stream or sys.stdin
+    loop = asyncio.get_running_loop()
+    while True:
+        # readline bloqueia: roda fora do loop de eventos
+        line = await loop.run_in_executor(None, stream.readline)
+        if not line:
+            return
+        for lead in parse_event(line):
+            yield lead
+
+
+async def directory_source(path, poll_interval=1.0, once=False):
+    """
+    Arquivos .jsonl que aparecem no diretório, em ordem de modificação. Cada
+    arquivo lido vai para path/done/. Produtores devem gravar com outro nome
+    (ex.: .tmp) e renomear ao final. once: processa o que existe e encerra.
+    """
+    import asyncio
+
+    done_dir = os.path.join(path, 'done')
+    os.makedirs(done_dir, exist_ok=True)
+    while True:
+        files = sorted(glob.glob(os.path.join(path, '*.jsonl')), key=os.path.getmtime)
+        for file_path in files:
+            # Bytes inválidos viram linhas inválidas: o arquivo sempre chega ao fim e sai da fila
+            with open(file_path, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    for lead in parse_event(line):
+                        yield lead
+            os.replace(file_path, os.path.join(done_dir, os.path.basename(file_path)))
+        if once:
+            return
+        await asyncio.sleep(poll_interval)
+
+
+async def simulated_source(leads, rate, n, seed=42):
+    """
+    Produtor local simulado: n eventos amostrados de leads a `rate` eventos/s,
+    emitidos em rajadas a cada 10 ms. Se o pipeline não acompanha, a taxa real
+    cai (a espera no put é medida como tempo de backpressure).
+    """
+    import asyncio
+
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(leads), n)
+    tick = 0.01
+    per_tick = max(1, int(rate * tick))
+    start = time.perf_counter()
+    for offset in range(0, n, per_tick):
+        for i in picks[offset:offset + per_tick]:
+            yield dict(leads[i])
+        # Agenda pelo relógio: atrasos de um tick não se acumulam
+        delay = start + (offset + per_tick) / rate - time.perf_counter()
+        await asyncio.sleep(max(delay, 0))
+
+
+class IngestionStats:
+    """Contadores, latência ponta a ponta (recepção → gravação) e tempo de backpressure"""
+
+    def __init__(self, max_latencies=200_000):
+        self.received = 0
+        self.invalid = 0
+        self.written = 0
+        self.batches = 0
+        self.flushes = 0
+        self.max_pending = 0
+        self.backpressure_seconds = 0.0
+        self.latencies = deque(maxlen=max_latencies)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def summary(self):
+        import numpy as np
+
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'received': self.received,
+            'invalid': self.invalid,
+            'written': self.written,
+            'batches': self.batches,
+            'flushes': self.flushes,
+            'seconds': elapsed,
+            'events_per_second': self.written / elapsed if elapsed else 0.0,
+            'avg_batch': self.written / self.batches if self.batches else 0.0,
+            'max_pending': self.max_pending,
+            'backpressure_seconds': self.backpressure_seconds,
+            **{f'p{q}_ms': float(np.percentile(latencies, q)) for q in (50, 95, 99)},
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        invalid = f" | ⚠️ {s['invalid']:,} inválidos" if s['invalid'] else ''
+        print(f"📥 {s['received']:,} recebidos{invalid} | 💾 {s['written']:,} gravados em {s['seconds']:.2f}s "
+              f"({s['events_per_second']:,.0f} eventos/s)")
+        print(f"📦 {s['batches']:,} lotes (média {s['avg_batch']:.0f} leads) | {s['flushes']:,} gravações | "
+              f"fila máx. {s['max_pending']:,} | backpressure {s['backpressure_seconds']:.2f}s")
+        print(f"⏱️ Latência ponta a ponta: p50 {s['p50_ms']:.1f}ms | p95 {s['p95_ms']:.1f}ms | p99 {s['p99_ms']:.1f}ms")
+
+
+class IngestionPipeline:
+    """
+    fonte → fila de leads (max_pending) → micro-lotes (max_batch ou max_wait
+    segundos) → scoring → fila de gravação (max_write_queue lotes) → CSV.
+    O scoring e a gravação rodam cada um em uma thread própria, então ler,
+    pontuar e gravar se sobrepõem; a gravação junta lotes até flush_rows
+    leads ou flush_interval segundos. Eventos inválidos são contados e, com
+    dead_letter_path, gravados lá (JSON lines com o erro). Se uma etapa falha,
+    as outras são canceladas e o erro é propagado por run(). monitor (monitoring.RollingMonitor)
+    recebe cada lote pontuado; com snapshot_path o snapshot é regravado a
+    cada gravação.
+    """
+
+    def __init__(self, scorer=None, output_path=EVENTS_PATH, max_batch=500, max_wait=0.2,
+                 max_pending=10_000, max_write_queue=8, flush_rows=5_000, flush_interval=1.0,
+                 monitor=None, snapshot_path=None, dead_letter_path=None):
+        from monitoring import DRIFT_FEATURES
+
+        self.scorer = scorer or LeadScorer()
+        self.output_path = output_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.max_write_queue = max_write_queue
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.monitor = monitor
+        self.snapshot_path = snapshot_path
+        self.dead_letter_path = dead_letter_path
+        # Converted (quando o evento já vem rotulado) e as features de drift
+        # seguem no lote para o monitor, com ou sem modelo carregado
+        self.columns = list(dict.fromkeys(['Lead Number', 'Converted', *self.scorer.rules.input_columns,
+                                           *self.scorer.features, *DRIFT_FEATURES]))
+        self.stats = IngestionStats()
+
+    async def run(self, source):
+        """Consome a fonte até o fim e espera a última gravação; devolve as estatísticas"""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._leads = asyncio.Queue(self.max_pending)
+        self._writes = asyncio.Queue(self.max_write_queue)
+        self._score_pool = ThreadPoolExecutor(1, thread_name_prefix='score')
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix='write')
+        self.stats = IngestionStats()
+        tasks = [asyncio.create_task(self._consume(source)),
+                 asyncio.create_task(self._batcher()),
+                 asyncio.create_task(self._writer())]
+        try:
+            pending = tasks
+            while pending:
+                # Uma etapa que falha não deixa as outras presas nas filas limitadas
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._score_pool.shutdown()
+            self._write_pool.shutdown()
+            self.stats.finished = time.perf_counter()
+        return self.stats
+
+    async def _consume(self, source):
+        async for lead in source:
+            if not isinstance(lead, dict):
+                self._reject(lead if isinstance(lead, InvalidEvent) else InvalidEvent(repr(lead), 'esperado um objeto'))
+            else:
+                await self._put(lead)
+        await self._leads.put(_DONE)
+
+    def _reject(self, event):
+        self.stats.invalid += 1
+        if self.stats.invalid <= MAX_WARNINGS:
+            print(f"⚠️ Evento ignorado ({event.error}): {event.line[:200]}", file=sys.stderr)
+        if self.dead_letter_path:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or '.', exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'error': event.error, 'line': event.line}, ensure_ascii=False) + '\n')
+
+    async def _put(self, lead):
+        import asyncio
+
+        item = (time.perf_counter(), lead)
+        try:
+            self._leads.put_nowait(item)
+        except asyncio.QueueFull:
+            # Backpressure: a fonte espera o batcher liberar espaço
+            start = time.perf_counter()
+            await self._leads.put(item)
+            self.stats.backpressure_seconds += time.perf_counter() - start
+        self.stats.received += 1
+        self.stats.max_pending = max(self.stats.max_pending, self._leads.qsize())
+
+    async def _collect(self):
+        """Micro-lote: bloqueia até o primeiro lead e fecha por tamanho ou janela de tempo"""
+        import asyncio
+
+        first = await self._leads.get()
+        if first is _DONE:
+            return None, True
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._leads.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._leads.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _batcher(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch, done = await self._collect()
+            if batch:
+                received = [received_at for received_at, _ in batch]
+                scored = await loop.run_in_executor(self._score_pool, self._score, [lead for _, lead in batch])
+                self.stats.batches += 1
+                # Fila de gravação cheia: o batcher espera (e a fila de leads enche)
+                await self._writes.put((received, scored))
+        await self._writes.put(_DONE)
+
+    def _score(self, leads):
+        import pandas as pd
+
+        leads_df = pd.DataFrame.from_records(leads)
+        leads_df = leads_df.reindex(columns=self.columns)
+        # Eventos sem Lead Number não transformam a coluna em float
+        for col in ('Lead Number', 'Converted'):
+            leads_df[col] = pd.to_numeric(leads_df[col], errors='coerce').astype('Int64')
+        self.scorer.score_leads(leads_df)
+        if self.scorer.model is not None:
+            leads_df['probability'] = self.scorer.predict_proba(leads_df)
+        leads_df['scored_at'] = pd.Timestamp.now().isoformat(timespec='milliseconds')
+        if self.monitor is not None:
+            self.monitor.update(leads_df)
+        return leads_df
+
+    async def _writer(self):
+        import asyncio
+
+        import pandas as pd
+
+        loop = asyncio.get_running_loop()
+        pending, received, done = [], [], False
+        last_flush = time.perf_counter()
+        while not done:
+            timeout = max(self.flush_interval - (time.perf_counter() - last_flush), 0)
+            try:
+                item = await asyncio.wait_for(self._writes.get(), timeout) if pending else await self._writes.get()
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                pending.append(item[1])
+                received.extend(item[0])
+            rows = sum(len(frame) for frame in pending)
+            if pending and (done or rows >= self.flush_rows or time.perf_counter() - last_flush >= self.flush_interval):
+                await loop.run_in_executor(self._write_pool, self._write, pd.concat(pending, ignore_index=True))
+                now = time.perf_counter()
+                self.stats.latencies.extend(now - received_at for received_at in received)
+                self.stats.written += rows
+                self.stats.flushes += 1
+                pending, received, last_flush = [], [], now
+
+    def _write(self, scored):
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        header = _csv_header(self.output_path)
+        if header and set(header) != set(scored.columns):
+            # As colunas dependem do modelo (features, probability): um esquema
+            # diferente não é anexado ao arquivo existente, vai para um novo
+            rotated = _rotated_path(self.output_path)
+            print(f"⚠️ {self.output_path} tem outras colunas: gravando em {rotated}", file=sys.stderr)
+            self.output_path, header = rotated, None
+        if header:
+            scored = scored[header]
+        scored.to_csv(self.output_path, mode='a', header=not header, index=False)
+        if self.monitor is not None and self.snapshot_path:
+            self.monitor.write_snapshot(self.snapshot_path)
+
+
+def _csv_header(path):
+    """Colunas do CSV já gravado (None se o arquivo não existe ou está vazio)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), None)
+
+
+def _rotated_path(path):
+    root, ext = os.path.splitext(path)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    rotated, n = f'{root}.{stamp}{ext}', 1
+    while os.path.exists(rotated):
+        rotated, n = f'{root}.{stamp}-{n}{ext}', n + 1
+    return rotated
+
+
+def load_scorer(use_model=True, model_version=None, models_dir=MODELS_DIR):
+    """Regras sempre; modelo ML se houver versão salva (e use_model)"""
+    scorer = LeadScorer()
+    if use_model and list_versions(models_dir):
+        scorer.load_model(model_version, models_dir)
+    return scorer
+
+
+def build_source(args, columns):
+    if args.source == 'stdin':
+        return stdin_source()
+    if args.source == 'dir':
+        return directory_source(args.path, args.poll_interval, once=args.once)
+    import pandas as pd
+
+    leads = json.loads(pd.read_csv(args.data, usecols=columns).to_json(orient='records'))
+    return simulated_source(leads, args.rate, args.events)
+
+
+def run(args):
+    import asyncio
+
+    monitor = None
+    if args.snapshot:
+        from monitoring import REFERENCE_PATH, DriftReference, RollingMonitor
+        reference = DriftReference.load(REFERENCE_PATH) if os.path.exists(REFERENCE_PATH) else None
+        monitor = RollingMonitor(reference)
+    pipeline = IngestionPipeline(load_scorer(not args.no_model), args.output, args.max_batch,
+                                 args.max_wait_ms / 1000, args.max_pending, flush_rows=args.flush_rows,
+                                 monitor=monitor, snapshot_path=args.snapshot, dead_letter_path=args.dead_letter)
+    print(f"🚚 Ingestão ({args.source}) → {args.output}")
+    stats = asyncio.run(pipeline.run(build_source(args, pipeline.columns)))
+    stats.print_summary()
+    return stats
+
+
+def add_arguments(parser):
+    """Opções da ingestão (reaproveitadas pelo subcomando ingest do cli.py)"""
+    parser.add_argument('source', choices=['stdin', 'dir', 'simulate'])
+    parser.add_argument('path', nargs='?', default='data/incoming', help="Diretório observado (fonte 'dir')")
+    parser.add_argument('--output', default=EVENTS_PATH)
+    parser.add_argument('--max-batch', type=int, default=500)
+    parser.add_argument('--max-wait-ms', type=float, default=200)
+    parser.add_argument('--max-pending', type=int, default=10_000, help='Leads na fila antes da backpressure')
+    parser.add_argument('--flush-rows', type=int, default=5_000)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--once', action='store_true', help="Fonte 'dir': processa os arquivos atuais e encerra")
+    parser.add_argument('--data', default='data/Lead_Scoring.csv', help="Leads amostrados pela fonte 'simulate'")
+    parser.add_argument('--rate', type=float, default=5_000, help='Eventos/s do produtor simulado')
+    parser.add_argument('--events', type=int, default=100_000)
+    parser.add_argument('--no-model', action='store_true', help='Somente regras de negócio')
+    parser.add_argument('--snapshot', help='Snapshot de monitoramento (JSON) regravado a cada gravação')
+    parser.add_argument('--dead-letter', help='Grava eventos inválidos (JSON lines com o erro) neste arquivo')
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Ranking de Leads
+Consultas top-K por score sem ordenar nem copiar o DataFrame inteiro: um
+índice por faixa de score (scores são inteiros pequenos) responde top-K geral,
+com filtro e por grupo (cidade, fonte, responsável...) devolvendo só posições
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ScoreIndex:
+    """
+    Posições dos leads do maior para o menor score; empates mantêm a ordem
+    original (a mesma regra do TopLeads do streaming). Montado uma vez por
+    scoring e reaproveitado por todas as consultas.
+    """
+
+    def __init__(self, scores):
+        scores = np.asarray(scores)
+        self.top_score = int(scores.max()) if len(scores) else 0
+        key = self.top_score - scores
+        if len(scores) and key.max() < 2 ** 16:
+            # Chave inteira de 16 bits: a ordenação estável do NumPy é um radix sort (O(n))
+            key = key.astype(np.uint16)
+        self.order = np.argsort(key, kind='stable')
+        # Fim de cada faixa em order: bounds[i] = quantos leads têm score >= top_score - i
+        self.bounds = np.cumsum(np.bincount(key, minlength=1)) if len(scores) else np.zeros(1, dtype=np.int64)
+
+    def at_least(self, min_score):
+        """Posições com score >= min_score, já ordenadas (fatia do índice, sem cópia)"""
+        if min_score is None or min_score <= self.top_score - len(self.bounds) + 1:
+            return self.order
+        if min_score > self.top_score:
+            return self.order[:0]
+        return self.order[:self.bounds[self.top_score - min_score]]
+
+    def top(self, k=None, min_score=None, mask=None, groups=None):
+        """
+        Posições dos K melhores leads.
+        mask: array booleano alinhado ao frame (ex.: Converted == 0).
+        groups: valores alinhados ao frame; devolve os K melhores de cada
+        grupo, grupo a grupo (o grupo do melhor lead primeiro).
+        """
+        positions = self.at_least(min_score)
+        if mask is not None:
+            positions = positions[np.asarray(mask)[positions]]
+        if groups is None:
+            return positions[:k]
+
+        codes, _ = pd.factorize(np.asarray(groups, dtype=object)[positions], use_na_sentinel=False)
+        by_group = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes)
+        rank = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return positions[by_group if k is None else by_group[rank < k]]
+
+
+def top_leads(df, k=10, min_score=None, mask=None, by=None, score_col='Lead_Score', index=None):
+    """
+    Os K leads de maior score (por grupo se by for informado) como DataFrame.
+    Só as linhas selecionadas são copiadas; passe index para reaproveitar um
+    ScoreIndex já montado sobre o mesmo frame.
+    """
+    index = index if index is not None else ScoreIndex(df[score_col].to_numpy())
+    groups = df[by].to_numpy() if by is not None else None
+    return df.iloc[index.top(k, min_score, mask, groups)]
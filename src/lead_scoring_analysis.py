@@ -6,21 +6,71 @@ Autor: Arthur Silva
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
-from sklearn.preprocessing import LabelEncoder
+from scoring_model import LeadScorer, encode_features
+from lead_ranking import ScoreIndex
+from storage import default_data_path, load_compact, read_leads
+from model_store import (MODELS_DIR, data_fingerprint, find_by_fingerprint, frame_fingerprint,
+                         load_artifact, save_artifact)
+from stats_engine import BEHAVIORAL_COLS, compute_lead_stats
+from profiling import StageProfiler
 import warnings
 warnings.filterwarnings('ignore')
 
+ML_FEATURES = [
+    'TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit',
+    'Lead Source', 'Last Activity', 'Lead Quality', 'Lead Origin'
+]
+RF_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+def encode_categorical(values):
+    """
+    Codifica uma coluna categórica a partir dos códigos de category.
+    Equivale a LabelEncoder().fit_transform(values.fillna('Unknown').astype(str)).
+    """
+    from sklearn.preprocessing import LabelEncoder
+    
+    cat = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    cat = cat.cat.remove_unused_categories()
+    classes = sorted(set(map(str, cat.cat.categories)) | ({'Unknown'} if cat.isna().any() else set()))
+    cat = cat.cat.rename_categories([str(c) for c in cat.cat.categories])
+    cat = cat.cat.set_categories(classes).fillna('Unknown')
+    
+    le = LabelEncoder()
+    le.classes_ = np.asarray(classes)
+    return cat.cat.codes, le
+
+
+def build_feature_matrix(df, features=ML_FEATURES):
+    """
+    Matriz de features do modelo sem copiar o frame: numéricas vão direto e
+    categóricas reaproveitam os códigos de category. Retorna (X, encoders).
+    """
+    X = pd.DataFrame(index=df.index)
+    encoders = {}
+    for col in features:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            X[col] = df[col].fillna(0)
+        else:
+            X[col], encoders[col] = encode_categorical(df[col])
+    return X, encoders
+
+
 class LeadScoringAnalysis:
-    def __init__(self, data_path):
-        """Inicializa a análise de lead scoring"""
-        self.df = pd.read_csv(data_path)
+    def __init__(self, data_path, columns=None, compact=True):
+        """Inicializa a análise de lead scoring (CSV ou dataset Parquet)"""
+        if compact:
+            # category para textos de baixa cardinalidade, int8/int16/float32 para numéricas
+            self.df = load_compact(data_path, columns=columns)
+        else:
+            self.df = read_leads(data_path, columns=columns)
+        self.data_path = data_path
         self.le_dict = {}
+        self.ml_features = []
         self.model = None
+        self.model_fingerprint = ''
+        self.stats = None
+        self.score_index = None
+        self.promising = None
         
         print("🎯 Lead Scoring Analysis Iniciada")
         print(f"📊 Dataset carregado: {self.df.shape[0]} leads, {self.df.shape[1]} variáveis")
@@ -32,24 +82,20 @@ class LeadScoringAnalysis:
         print("📈 ANÁLISE EXPLORATÓRIA")
         print("="*50)
         
+        # Todas as agregações em uma passada (reaproveitadas pelos gráficos)
+        self.stats = compute_lead_stats(self.df, ['Lead Source'], BEHAVIORAL_COLS)
+        
         # Análise por fonte
-        source_analysis = self.df.groupby('Lead Source').agg({
-            'Converted': ['count', 'sum', 'mean']
-        }).round(3)
-        source_analysis.columns = ['Total_Leads', 'Convertidos', 'Taxa_Conversao']
-        source_analysis = source_analysis[source_analysis['Total_Leads'] >= 50]
-        source_analysis = source_analysis.sort_values('Taxa_Conversao', ascending=False)
+        source_analysis = self.stats.conversion_by('Lead Source', min_count=50).round(3)
         
         print("\n🎯 CONVERSÃO POR FONTE:")
         print(source_analysis)
         
         # Comportamento no site
         print("\n🖱️ COMPORTAMENTO NO SITE:")
-        behavioral_cols = ['TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit']
-        
-        for col in behavioral_cols:
-            conv_avg = self.df[self.df['Converted'] == 1][col].mean()
-            not_conv_avg = self.df[self.df['Converted'] == 0][col].mean()
+        for col in BEHAVIORAL_COLS:
+            conv_avg = self.stats.class_stat(col)[1]
+            not_conv_avg = self.stats.class_stat(col)[0]
             diff = ((conv_avg/not_conv_avg - 1) * 100) if not_conv_avg > 0 else 0
             
             print(f"\n{col}:")
@@ -65,51 +111,11 @@ class LeadScoringAnalysis:
         print("🎯 CRIANDO MODELO DE SCORING")
         print("="*50)
         
-        def calculate_score(row):
-            score = 0
-            
-            # Fonte (peso 40%)
-            source_scores = {
-                'Welingak Website': 40, 'Reference': 35, 'Google': 20,
-                'Organic Search': 15, 'Direct Traffic': 10, 'Olark Chat': 5
-            }
-            score += source_scores.get(row.get('Lead Source', ''), 0)
-            
-            # Tempo no site (peso 20%)
-            time_spent = row.get('Total Time Spent on Website', 0) or 0
-            if time_spent > 1000: score += 20
-            elif time_spent > 500: score += 15
-            elif time_spent > 200: score += 10
-            elif time_spent > 0: score += 5
-            
-            # Última atividade (peso 25%)
-            activity_scores = {
-                'Had a Phone Conversation': 25, 'SMS Sent': 20,
-                'Email Opened': 10, 'Email Link Clicked': 5
-            }
-            score += activity_scores.get(row.get('Last Activity', ''), 0)
-            
-            # Visitas (peso 10%)
-            visits = row.get('TotalVisits', 0) or 0
-            if visits > 5: score += 10
-            elif visits > 2: score += 5
-            
-            # Qualidade (peso 5%)
-            quality_scores = {'High': 15, 'Medium': 10, 'Low': 5}
-            score += quality_scores.get(row.get('Lead Quality', ''), 0)
-            
-            return min(score, 100)
-        
-        self.df['Lead_Score'] = self.df.apply(calculate_score, axis=1)
-        
-        # Categorias de prioridade
-        def get_priority(score):
-            if score >= 70: return 'ALTA'
-            elif score >= 50: return 'MÉDIA'
-            elif score >= 30: return 'BAIXA'
-            else: return 'MUITO BAIXA'
-        
-        self.df['Prioridade'] = self.df['Lead_Score'].apply(get_priority)
+        # Scoring vetorizado (mesmas regras de LeadScorer.calculate_business_score)
+        LeadScorer().score_leads(self.df)
+        # Índice por faixa de score: consultas top-K sem reordenar o frame
+        self.score_index = ScoreIndex(self.df['Lead_Score'].to_numpy())
+        self.promising = None
         
         # Estatísticas do scoring
         print(f"📊 Score médio: {self.df['Lead_Score'].mean():.1f}/100")
@@ -123,50 +129,61 @@ class LeadScoringAnalysis:
         
         return self.df['Lead_Score']
     
-    def train_ml_model(self):
-        """Treina modelo de Machine Learning"""
+    def train_ml_model(self, force=False, models_dir=MODELS_DIR, early_stopping=False):
+        """
+        Treina modelo de Machine Learning (ou reaproveita o artefato se os dados não mudaram).
+        early_stopping: cresce a floresta até o AUC out-of-bag estabilizar.
+        """
+        # sklearn só é carregado quando há treino de fato
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import classification_report, roc_auc_score
+        from sklearn.model_selection import train_test_split
+        from training import fit_forest_early_stopping
+        
         print("\n" + "="*50)
         print("🤖 TREINANDO MODELO ML")
         print("="*50)
         
         # Features para ML
-        ml_features = [
-            'TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit',
-            'Lead Source', 'Last Activity', 'Lead Quality', 'Lead Origin'
-        ]
-        
-        ml_df = self.df[ml_features + ['Converted']].copy()
-        
-        # Tratar valores nulos
-        for col in ml_df.columns:
-            if ml_df[col].dtype == 'object':
-                ml_df[col] = ml_df[col].fillna('Unknown')
-            else:
-                ml_df[col] = ml_df[col].fillna(0)
-        
-        # Encode categóricas
-        categorical_cols = ml_df.select_dtypes(include=['object']).columns
-        for col in categorical_cols:
-            le = LabelEncoder()
-            ml_df[col] = le.fit_transform(ml_df[col].astype(str))
-            self.le_dict[col] = le
+        self.ml_features = ml_features = list(ML_FEATURES)
+        
+        # Mesmos dados + mesmas features/parâmetros = mesmo modelo
+        fingerprint = data_fingerprint(self.data_path, extra={
+            'features': ml_features, 'params': RF_PARAMS, 'early_stopping': early_stopping
+        })
+        self.model_fingerprint = fingerprint
+        version = None if force else find_by_fingerprint(fingerprint, models_dir)
+        if version is not None:
+            bundle, metadata = load_artifact(version, models_dir)
+            self.model, self.le_dict = bundle['model'], bundle['le_dict']
+            print(f"♻️ Dados inalterados: reaproveitando modelo {version} ({metadata['created_at']})")
+            print(f"🎯 AUC Score: {metadata['metrics']['auc']:.3f}")
+            return self.model
+        
+        X, encoders = build_feature_matrix(self.df, ml_features)
+        self.le_dict.update(encoders)
+        y = self.df['Converted']
         
         # Split dados
-        X = ml_df.drop('Converted', axis=1)
-        y = ml_df['Converted']
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Treinar modelo
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.model.fit(X_train, y_train)
+        # Treinar modelo (todos os núcleos)
+        if early_stopping:
+            self.model, history = fit_forest_early_stopping(X_train, y_train, random_state=RF_PARAMS['random_state'])
+            n_trees, oob, _ = history[-1]
+            print(f"🌲 Parada antecipada: {n_trees} árvores (AUC OOB {oob:.3f})")
+        else:
+            self.model = RandomForestClassifier(**RF_PARAMS, n_jobs=-1)
+            self.model.fit(X_train, y_train)
         
         # Avaliar
         y_pred = self.model.predict(X_test)
         y_proba = self.model.predict_proba(X_test)[:, 1]
         
+        auc = roc_auc_score(y_test, y_proba)
         print("📊 PERFORMANCE DO MODELO:")
         print(classification_report(y_test, y_pred))
-        print(f"🎯 AUC Score: {roc_auc_score(y_test, y_proba):.3f}")
+        print(f"🎯 AUC Score: {auc:.3f}")
         
         # Feature importance
         feature_importance = pd.DataFrame({
@@ -178,26 +195,60 @@ class LeadScoringAnalysis:
         for _, row in feature_importance.head(7).iterrows():
             print(f"  {row['feature']}: {row['importance']:.3f}")
         
+        metrics = {'auc': auc, 'accuracy': float((y_pred == y_test).mean())}
+        version = save_artifact(self.model, self.le_dict, ml_features, fingerprint, metrics, models_dir)
+        print(f"\n💾 Modelo salvo: {models_dir}/{version}")
+        
+        return self.model
+    
+    def update_ml_model(self, new_leads, n_trees=25, models_dir=MODELS_DIR):
+        """Adiciona árvores treinadas com leads novos já rotulados ao modelo atual"""
+        from training import add_trees
+        
+        if self.model is None:
+            bundle, metadata = load_artifact(models_dir=models_dir, mmap_mode=None)
+            self.model, self.le_dict = bundle['model'], bundle['le_dict']
+            self.ml_features, self.model_fingerprint = bundle['features'], metadata['fingerprint']
+        
+        X_new = encode_features(new_leads, self.ml_features, self.le_dict)
+        y_new = new_leads['Converted']
+        add_trees(self.model, X_new, y_new, n_trees)
+        
+        self.model_fingerprint = frame_fingerprint(new_leads[self.ml_features + ['Converted']],
+                                                   base=self.model_fingerprint)
+        version = save_artifact(self.model, self.le_dict, self.ml_features, self.model_fingerprint,
+                                {'n_trees': len(self.model.estimators_), 'new_leads': len(new_leads)},
+                                models_dir)
+        print(f"🌲 +{n_trees} árvores com {len(new_leads):,} leads novos → {models_dir}/{version}")
         return self.model
     
+    def top_leads(self, k=10, min_score=None, by=None, only_open=True):
+        """
+        Os K leads de maior score (ou os K de cada grupo de `by`, ex.: 'City'),
+        por padrão só os não convertidos. Usa o índice de score: copia apenas
+        as linhas selecionadas.
+        """
+        if self.score_index is None:
+            self.create_lead_score()
+        mask = (self.df['Converted'] == 0).to_numpy() if only_open else None
+        groups = self.df[by].to_numpy() if by is not None else None
+        return self.df.iloc[self.score_index.top(k, min_score, mask, groups)]
+    
     def identify_promising_leads(self, min_score=60):
         """Identifica leads mais promissores"""
         print("\n" + "="*50)
         print(f"🔍 LEADS PROMISSORES (Score >= {min_score})")
         print("="*50)
         
-        promising = self.df[
-            (self.df['Converted'] == 0) & 
-            (self.df['Lead_Score'] >= min_score)
-        ].copy()
-        
-        promising = promising.sort_values('Lead_Score', ascending=False)
+        # Já sai ordenado do índice; guardado para o save_results não refazer a consulta
+        promising = self.top_leads(k=None, min_score=min_score)
+        self.promising = (min_score, promising)
         
         print(f"🎯 Encontrados {len(promising)} leads promissores")
         
         if len(promising) > 0:
             print(f"\n🥇 TOP 10 LEADS PARA FOCAR:")
-            for i, (_, lead) in enumerate(promising.head(10).iterrows()):
+            for i, lead in enumerate(promising.head(10).to_dict('records')):
                 print(f"\n{i+1}. Lead #{lead['Lead Number']} (Score: {lead['Lead_Score']}/100)")
                 print(f"   📍 Fonte: {lead['Lead Source']}")
                 print(f"   ⏱️ Tempo no site: {lead['Total Time Spent on Website']}s")
@@ -225,7 +276,7 @@ class LeadScoringAnalysis:
         print("  3. Implementar scoring automático")
         print("  4. Treinar equipe para abordagem telefônica")
         
-        print("\n📊 KPIs PARA MONITORAR:")
+        print("\n📊 KPIs PARA MONITORAR (janelas de tempo em src/monitoring.py):")
         print("  • Taxa de conversão por fonte")
         print("  • Tempo médio no site por segmento") 
         print("  • Efetividade por prioridade")
@@ -237,10 +288,10 @@ class LeadScoringAnalysis:
         self.df.to_csv('data/processed/leads_with_scores.csv', index=False)
         
         # Salvar leads promissores
-        promising = self.df[
-            (self.df['Converted'] == 0) & 
-            (self.df['Lead_Score'] >= 60)
-        ].sort_values('Lead_Score', ascending=False)
+        if self.promising is not None and self.promising[0] == 60:
+            promising = self.promising[1]
+        else:
+            promising = self.top_leads(k=None, min_score=60)
         
         promising.to_csv('data/processed/promising_leads.csv', index=False)
         
@@ -248,18 +299,29 @@ class LeadScoringAnalysis:
         print(f"  📁 data/processed/leads_with_scores.csv")
         print(f"  📁 data/processed/promising_leads.csv")
 
-def main():
-    """Função principal"""
+def main(data_path=None, profiler=None, metrics_json=None, metrics_prom=None):
+    """Função principal (cada etapa é medida pelo StageProfiler)"""
+    profiler = profiler or StageProfiler()
+    
     # Inicializar análise
-    analyzer = LeadScoringAnalysis('data/Lead_Scoring.csv')
+    with profiler.stage('load') as stage:
+        analyzer = LeadScoringAnalysis(data_path or default_data_path())
+        stage.rows_out = len(analyzer.df)
+    rows = len(analyzer.df)
     
     # Executar análises
-    analyzer.exploratory_analysis()
-    analyzer.create_lead_score()
-    analyzer.train_ml_model()
-    analyzer.identify_promising_leads()
+    with profiler.stage('exploratory_analysis', rows_in=rows) as stage:
+        stage.rows_out = len(analyzer.exploratory_analysis())
+    with profiler.stage('create_lead_score', rows_in=rows) as stage:
+        stage.rows_out = len(analyzer.create_lead_score())
+    with profiler.stage('train_ml_model', rows_in=rows) as stage:
+        analyzer.train_ml_model()
+    with profiler.stage('identify_promising_leads', rows_in=rows) as stage:
+        stage.rows_out = len(analyzer.identify_promising_leads())
     analyzer.generate_recommendations()
-    analyzer.save_results()
+    with profiler.stage('save_results', rows_in=rows) as stage:
+        analyzer.save_results()
+        stage.rows_out = rows
     
     print("\n" + "="*50)
     print("✅ ANÁLISE CONCLUÍDA COM SUCESSO!")
@@ -269,6 +331,24 @@ def main():
     print("  2. Implementação das recomendações") 
     print("  3. Monitoramento dos KPIs")
     print("  4. Ajuste do modelo mensalmente")
+    
+    profiler.print_summary()
+    if metrics_json:
+        print(f"📄 Métricas: {profiler.write_json(metrics_json)}")
+    if metrics_prom:
+        print(f"📄 Métricas (Prometheus): {profiler.write_prometheus(metrics_prom)}")
+    return profiler
+
+def parse_args(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=None)
+    parser.add_argument('--metrics-json', help='Relatório por etapa em JSON')
+    parser.add_argument('--metrics-prom', help='Relatório por etapa no formato textfile do Prometheus')
+    parser.add_argument('--cprofile-dir', help='Grava um cProfile (.prof) por etapa')
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(args.data, StageProfiler(profile_dir=args.cprofile_dir), args.metrics_json, args.metrics_prom)
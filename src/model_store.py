@@ -0,0 +1,107 @@
+"""
+Repositório de Modelos
+Artefatos versionados (modelo, encoders, features e fingerprint dos dados)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+MODELS_DIR = 'models'
+BUNDLE_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+
+
+def data_fingerprint(path, extra=None):
+    """
+    SHA-256 do conteúdo dos dados de treino (arquivo CSV ou diretório Parquet).
+    extra (ex.: features e parâmetros do modelo) entra no hash para que mudanças
+    no treino também invalidem o artefato.
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    if extra is not None:
+        digest.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df, base=''):
+    """SHA-256 de um DataFrame (ex.: lote de leads novos) encadeado a um fingerprint anterior"""
+    import pandas as pd
+
+    digest = hashlib.sha256(base.encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def list_versions(models_dir=MODELS_DIR):
+    """Versões disponíveis, da mais antiga para a mais recente"""
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(name for name in os.listdir(models_dir)
+                  if name.startswith('v') and os.path.exists(os.path.join(models_dir, name, METADATA_FILE)))
+
+
+def read_metadata(version, models_dir=MODELS_DIR):
+    with open(os.path.join(models_dir, version, METADATA_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_by_fingerprint(fingerprint, models_dir=MODELS_DIR):
+    """Versão mais recente treinada com o mesmo fingerprint (ou None)"""
+    for version in reversed(list_versions(models_dir)):
+        if read_metadata(version, models_dir).get('fingerprint') == fingerprint:
+            return version
+    return None
+
+
+def save_artifact(model, le_dict, features, fingerprint, metrics=None, models_dir=MODELS_DIR):
+    """Grava uma nova versão do artefato e retorna o nome da versão"""
+    import joblib
+
+    versions = list_versions(models_dir)
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+    path = os.path.join(models_dir, version)
+    os.makedirs(path)
+
+    # Sem compressão: permite carregar os arrays das árvores com mmap
+    joblib.dump({'model': model, 'le_dict': le_dict, 'features': features},
+                os.path.join(path, BUNDLE_FILE))
+    # Floresta achatada para a inferência rápida (ver inference.py)
+    from inference import FastModel
+    FastModel.from_sklearn(model, le_dict, features).save(path)
+    metadata = {
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'fingerprint': fingerprint,
+        'features': list(features),
+        'metrics': metrics or {},
+    }
+    with open(os.path.join(path, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return version
+
+
+def load_artifact(version=None, models_dir=MODELS_DIR, mmap_mode='r'):
+    """
+    Carrega um artefato (padrão: versão mais recente). Com mmap_mode='r' os
+    arrays do modelo são mapeados do disco em vez de copiados para a memória.
+    """
+    import joblib
+
+    if version is None:
+        versions = list_versions(models_dir)
+        if not versions:
+            raise FileNotFoundError(f"Nenhum modelo salvo em {models_dir}/")
+        version = versions[-1]
+    bundle = joblib.load(os.path.join(models_dir, version, BUNDLE_FILE), mmap_mode=mmap_mode)
+    return bundle, read_metadata(version, models_dir)
@@ -0,0 +1,415 @@
+"""
+Monitoramento em Janelas de Tempo
+Agregados incrementais por janela deslizante (conversão e tempo no site por
+prioridade, conversão por fonte, distribuição de score e de features) e drift
+(PSI) em relação ao conjunto de treino. Cada lote pontuado entra uma única
+vez; blocos de tempo que saem da janela são subtraídos dos totais, então o
+snapshot não reagrupa o histórico.
+
+  python src/monitoring.py reference --data data/Lead_Scoring.csv
+  python src/monitoring.py replay data/processed/scored_events.csv --time-column scored_at
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scoring_rules import default_rules
+
+REFERENCE_PATH = 'data/processed/drift_reference.json'
+DRIFT_FEATURES = [
+    'TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit',
+    'Lead Source', 'Last Activity', 'Lead Quality', 'Lead Origin'
+]
+SOURCE_COL = 'Lead Source'
+TIME_COL = 'Total Time Spent on Website'
+# Faixas usuais de PSI: < 0.1 estável, 0.1-0.25 moderado, > 0.25 significativo
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+SCORE_BIN_WIDTH = 10
+
+
+def psi(expected, actual, eps=1e-4):
+    """Population Stability Index entre duas contagens nas mesmas faixas"""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return None
+    e = np.clip(expected / expected.sum(), eps, None)
+    a = np.clip(actual / actual.sum(), eps, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def psi_level(value):
+    if value is None:
+        return None
+    return 'significativo' if value > PSI_MAJOR else 'moderado' if value > PSI_MODERATE else 'estável'
+
+
+class FeatureBins:
+    """
+    Faixas de uma feature definidas no treino: decis para numéricas (mais uma
+    faixa para nulos) e categorias do treino para texto (mais uma faixa para
+    valores nunca vistos; nulos contam como 'Unknown', como no modelo)
+    """
+
+    def __init__(self, kind, edges=None, categories=None):
+        self.kind = kind
+        self.edges = np.asarray(edges if edges is not None else [], dtype=np.float64)
+        self.categories = list(categories or [])
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    @classmethod
+    def fit(cls, values):
+        if pd.api.types.is_numeric_dtype(values):
+            present = values.dropna().to_numpy(dtype=np.float64)
+            edges = np.unique(np.quantile(present, np.linspace(0.1, 0.9, 9))) if len(present) else []
+            return cls('numeric', edges=edges)
+        return cls('categorical', categories=sorted(values.astype(object).fillna('Unknown').astype(str).unique()))
+
+    @property
+    def size(self):
+        return len(self.edges) + 2 if self.kind == 'numeric' else len(self.categories) + 1
+
+    def codes(self, values):
+        if self.kind == 'numeric':
+            numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            codes = np.searchsorted(self.edges, numbers, side='right')
+            return np.where(np.isnan(numbers), self.size - 1, codes)
+        codes = values.astype(object).fillna('Unknown').astype(str).map(self._lookup)
+        return codes.fillna(self.size - 1).to_numpy(dtype=np.int64)
+
+    def counts(self, values):
+        return np.bincount(self.codes(values), minlength=self.size)
+
+    def to_dict(self):
+        if self.kind == 'numeric':
+            return {'kind': self.kind, 'edges': self.edges.tolist()}
+        return {'kind': self.kind, 'categories': self.categories}
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec['kind'], spec.get('edges'), spec.get('categories'))
+
+
+class DriftReference:
+    """Distribuições do conjunto de treino: histograma de score e contagem por faixa de cada feature"""
+
+    def __init__(self, bins, feature_counts, score_counts, rows, created_at=None):
+        self.bins = bins
+        self.feature_counts = {name: np.asarray(counts) for name, counts in feature_counts.items()}
+        self.score_counts = np.asarray(score_counts)
+        self.rows = rows
+        self.created_at = created_at or datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def from_frame(cls, df, features=DRIFT_FEATURES, rules=None):
+        rules = rules or default_rules()
+        features = [col for col in features if col in df.columns]
+        bins = {col: FeatureBins.fit(df[col]) for col in features}
+        scores = rules.score_frame(df)
+        return cls(
+            bins,
+            {col: bins[col].counts(df[col]) for col in features},
+            np.bincount(np.clip(scores, 0, rules.rules.max_score), minlength=rules.rules.max_score + 1),
+            len(df),
+        )
+
+    def save(self, path=REFERENCE_PATH):
+        payload = {
+            'created_at': self.created_at,
+            'rows': self.rows,
+            'score_counts': self.score_counts.tolist(),
+            'features': {name: {**self.bins[name].to_dict(), 'counts': self.feature_counts[name].tolist()}
+                         for name in self.bins},
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path=REFERENCE_PATH):
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        features = payload['features']
+        return cls(
+            {name: FeatureBins.from_dict(spec) for name, spec in features.items()},
+            {name: spec['counts'] for name, spec in features.items()},
+            payload['score_counts'],
+            payload['rows'],
+            payload['created_at'],
+        )
+
+
+class RollingMonitor:
+    """
+    Janela deslizante de window_seconds dividida em blocos de bucket_seconds.
+    Cada bloco guarda só contadores (arrays de tamanho fixo) e os totais da
+    janela são mantidos somando blocos que entram e subtraindo os que saem.
+    O tempo da janela é o do evento mais recente (funciona também ao
+    reprocessar histórico). Seguro para um thread de update e outros de snapshot.
+    """
+
+    def __init__(self, reference=None, window_seconds=7 * 24 * 3600, bucket_seconds=3600, rules=None):
+        self.reference = reference
+        self.rules = rules or default_rules()
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.priorities = list(self.rules.rules.priority_labels)
+        self.sources = (reference.bins[SOURCE_COL].categories + ['Outras']
+                        if reference is not None and SOURCE_COL in reference.bins else None)
+        self._buckets = {}
+        self._totals = None
+        self._latest = None
+        self._lock = threading.Lock()
+
+    def _empty(self):
+        n_priorities = len(self.priorities)
+        arrays = {
+            'priority_leads': np.zeros(n_priorities, dtype=np.int64),
+            'priority_labeled': np.zeros(n_priorities, dtype=np.int64),
+            'priority_converted': np.zeros(n_priorities, dtype=np.int64),
+            'priority_score_sum': np.zeros(n_priorities),
+            'priority_time_sum': np.zeros(n_priorities),
+            'priority_time_count': np.zeros(n_priorities, dtype=np.int64),
+            'score_counts': np.zeros(self.rules.rules.max_score + 1, dtype=np.int64),
+        }
+        if self.sources is not None:
+            for key in ('source_leads', 'source_labeled', 'source_converted'):
+                arrays[key] = np.zeros(len(self.sources), dtype=np.int64)
+        if self.reference is not None:
+            for name, bins in self.reference.bins.items():
+                arrays[f'feature:{name}'] = np.zeros(bins.size, dtype=np.int64)
+        return arrays
+
+    def _aggregate(self, scored):
+        """Contadores de um lote pontuado (Lead_Score e Prioridade; Converted se já rotulado)"""
+        arrays = self._empty()
+        n_priorities = len(self.priorities)
+        priority = pd.Categorical(scored['Prioridade'], categories=self.priorities).codes
+        known = priority >= 0
+        scores = scored['Lead_Score'].to_numpy(dtype=np.int64)
+        converted = (pd.to_numeric(scored['Converted'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                     if 'Converted' in scored.columns else np.full(len(scored), np.nan))
+        labeled = ~np.isnan(converted)
+        is_converted = labeled & (converted == 1)
+
+        def by(codes, size, weights=None, mask=None):
+            codes, weights = (codes, weights) if mask is None else (codes[mask], None if weights is None else weights[mask])
+            return np.bincount(codes, weights=weights, minlength=size)[:size]
+
+        arrays['priority_leads'] += by(priority, n_priorities, mask=known)
+        arrays['priority_labeled'] += by(priority, n_priorities, mask=known & labeled)
+        arrays['priority_converted'] += by(priority, n_priorities, mask=known & is_converted)
+        arrays['priority_score_sum'] += by(priority, n_priorities, scores.astype(np.float64), mask=known)
+        if TIME_COL in scored.columns:
+            seconds = pd.to_numeric(scored[TIME_COL], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            timed = known & ~np.isnan(seconds)
+            arrays['priority_time_sum'] += by(priority, n_priorities, seconds, mask=timed)
+            arrays['priority_time_count'] += by(priority, n_priorities, mask=timed)
+        arrays['score_counts'] += np.bincount(np.clip(scores, 0, self.rules.rules.max_score),
+                                              minlength=self.rules.rules.max_score + 1)
+
+        if self.sources is not None and SOURCE_COL in scored.columns:
+            source = self.reference.bins[SOURCE_COL].codes(scored[SOURCE_COL])
+            arrays['source_leads'] += by(source, len(self.sources))
+            arrays['source_labeled'] += by(source, len(self.sources), mask=labeled)
+            arrays['source_converted'] += by(source, len(self.sources), mask=is_converted)
+        if self.reference is not None:
+            for name, bins in self.reference.bins.items():
+                if name in scored.columns:
+                    arrays[f'feature:{name}'] += bins.counts(scored[name])
+        return arrays
+
+    def update(self, scored, at=None):
+        """Incorpora um lote pontuado com horário `at` (datetime, Timestamp ou epoch; padrão: agora)"""
+        if len(scored) == 0:
+            return
+        if at is None:
+            at = time.time()
+        elif not isinstance(at, (int, float, np.integer, np.floating)):
+            at = float(_epoch_seconds(pd.Series([at]))[0])
+        arrays = self._aggregate(scored)
+        key = int(at // self.bucket_seconds)
+        with self._lock:
+            if self._totals is None:
+                self._totals = self._empty()
+            if self._latest is not None and key <= self._latest - self._n_buckets:
+                return  # Atrasado demais: o bloco já saiu da janela
+            bucket = self._buckets.setdefault(key, self._empty())
+            for name, values in arrays.items():
+                bucket[name] += values
+                self._totals[name] += values
+            if self._latest is None or key > self._latest:
+                self._latest = key
+                self._expire()
+
+    def update_frame(self, scored, time_column):
+        """Lote com horário por linha: agrupa pelo bloco de tempo de cada evento"""
+        keys = _epoch_seconds(scored[time_column]) // self.bucket_seconds
+        for key in np.unique(keys):
+            self.update(scored[keys == key], at=int(key) * self.bucket_seconds)
+
+    @property
+    def _n_buckets(self):
+        return max(1, int(np.ceil(self.window_seconds / self.bucket_seconds)))
+
+    def _expire(self):
+        cutoff = self._latest - self._n_buckets
+        for key in [key for key in self._buckets if key <= cutoff]:
+            for name, values in self._buckets.pop(key).items():
+                self._totals[name] -= values
+
+    def snapshot(self):
+        """KPIs e drift da janela atual (somente os totais: custo independe do histórico)"""
+        with self._lock:
+            totals = {name: values.copy() for name, values in (self._totals or self._empty()).items()}
+            latest = self._latest
+        window_end = None if latest is None else (latest + 1) * self.bucket_seconds
+        leads = int(totals['priority_leads'].sum())
+
+        def rate(num, den):
+            return float(num / den) if den else None
+
+        priorities = {
+            label: {
+                'leads': int(totals['priority_leads'][i]),
+                'labeled': int(totals['priority_labeled'][i]),
+                'conversion_rate': rate(totals['priority_converted'][i], totals['priority_labeled'][i]),
+                'avg_score': rate(totals['priority_score_sum'][i], totals['priority_leads'][i]),
+                'avg_time_on_site': rate(totals['priority_time_sum'][i], totals['priority_time_count'][i]),
+            }
+            for i, label in enumerate(self.priorities)
+        }
+        snapshot = {
+            'window_start': None if window_end is None else _iso(window_end - self._n_buckets * self.bucket_seconds),
+            'window_end': None if window_end is None else _iso(window_end),
+            'leads': leads,
+            'avg_score': rate(totals['priority_score_sum'].sum(), leads),
+            'by_priority': priorities,
+        }
+        if self.sources is not None:
+            snapshot['by_source'] = {
+                source: {
+                    'leads': int(totals['source_leads'][i]),
+                    'conversion_rate': rate(totals['source_converted'][i], totals['source_labeled'][i]),
+                }
+                for i, source in enumerate(self.sources) if totals['source_leads'][i]
+            }
+        if self.reference is not None:
+            score_psi = psi(_coarse(self.reference.score_counts), _coarse(totals['score_counts']))
+            feature_psi = {name: psi(self.reference.feature_counts[name], totals[f'feature:{name}'])
+                           for name in self.reference.bins}
+            snapshot['score_psi'] = {'value': score_psi, 'level': psi_level(score_psi)}
+            snapshot['feature_psi'] = {name: {'value': value, 'level': psi_level(value)}
+                                       for name, value in feature_psi.items()}
+        return snapshot
+
+    def write_snapshot(self, path):
+        """Snapshot em JSON (gravação atômica: dashboards nunca leem arquivo pela metade)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+def _coarse(score_counts):
+    """Histograma de score em faixas de 10 pontos (0-9, 10-19, ..., 90-100)"""
+    counts = np.asarray(score_counts)
+    starts = np.arange(0, len(counts), SCORE_BIN_WIDTH)
+    coarse = np.add.reduceat(counts, starts)
+    if len(counts) > 1 and (len(counts) - 1) % SCORE_BIN_WIDTH == 0:
+        # Score máximo (ex.: 100) entra na última faixa completa
+        coarse[-2] += coarse[-1]
+        coarse = coarse[:-1]
+    return coarse
+
+
+def _epoch_seconds(values):
+    """Segundos desde a época; horários sem fuso são tratados como hora local (como time.time())"""
+    times = pd.to_datetime(values)
+    if times.dt.tz is None:
+        times = times.dt.tz_localize(datetime.now().astimezone().tzinfo)
+    return ((times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch).isoformat(timespec='seconds')
+
+
+def print_snapshot(snapshot):
+    print(f"\n📈 JANELA {snapshot['window_start']} → {snapshot['window_end']} | {snapshot['leads']:,} leads")
+    print("\n🎯 EFETIVIDADE POR PRIORIDADE:")
+    for label, kpi in snapshot['by_priority'].items():
+        conversion = '-' if kpi['conversion_rate'] is None else f"{kpi['conversion_rate']:.1%}"
+        time_on_site = '-' if kpi['avg_time_on_site'] is None else f"{kpi['avg_time_on_site']:.0f}s"
+        print(f"  {label:<12} {kpi['leads']:>9,} leads | conversão {conversion:>6} | tempo no site {time_on_site}")
+    if 'by_source' in snapshot:
+        print("\n📊 CONVERSÃO POR FONTE:")
+        top = sorted(snapshot['by_source'].items(), key=lambda item: -item[1]['leads'])[:8]
+        for source, kpi in top:
+            conversion = '-' if kpi['conversion_rate'] is None else f"{kpi['conversion_rate']:.1%}"
+            print(f"  {source:<20} {kpi['leads']:>9,} leads | conversão {conversion}")
+    if 'score_psi' in snapshot:
+        flags = {'estável': '🟢', 'moderado': '🟡', 'significativo': '🔴', None: '⚪'}
+        print("\n🔀 DRIFT (PSI vs. treino):")
+        items = [('Lead_Score', snapshot['score_psi'])] + list(snapshot['feature_psi'].items())
+        for name, drift in items:
+            value = '-' if drift['value'] is None else f"{drift['value']:.3f}"
+            print(f"  {flags[drift['level']]} {name:<28} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reference = commands.add_parser('reference', help='Distribuições de referência do conjunto de treino')
+    reference.add_argument('--data', default=None)
+    reference.add_argument('--output', default=REFERENCE_PATH)
+
+    replay = commands.add_parser('replay', help='Alimenta o monitor com um arquivo de leads pontuados')
+    replay.add_argument('path')
+    replay.add_argument('--reference', default=REFERENCE_PATH)
+    replay.add_argument('--time-column', help='Horário de cada lead (ex.: scored_at); padrão: agora')
+    replay.add_argument('--window-hours', type=float, default=24 * 7)
+    replay.add_argument('--bucket-minutes', type=float, default=60)
+    replay.add_argument('--batch-size', type=int, default=100_000)
+    replay.add_argument('--snapshot', help='Grava o snapshot final em JSON')
+    args = parser.parse_args()
+
+    from storage import default_data_path, iter_leads, read_leads
+
+    if args.command == 'reference':
+        data_path = args.data or default_data_path()
+        ref = DriftReference.from_frame(read_leads(data_path))
+        print(f"💾 Referência de drift ({ref.rows:,} leads de {data_path}): {ref.save(args.output)}")
+        return
+
+    ref = DriftReference.load(args.reference) if os.path.exists(args.reference) else None
+    if ref is None:
+        print(f"⚠️ Sem referência em {args.reference}: drift não será calculado")
+    monitor = RollingMonitor(ref, args.window_hours * 3600, args.bucket_minutes * 60)
+    for batch in iter_leads(args.path, batch_size=args.batch_size):
+        if 'Lead_Score' not in batch.columns:
+            from scoring_model import LeadScorer
+            LeadScorer(monitor.rules).score_leads(batch)
+        if args.time_column:
+            monitor.update_frame(batch, args.time_column)
+        else:
+            monitor.update(batch)
+    print_snapshot(monitor.snapshot())
+    if args.snapshot:
+        print(f"\n📄 Snapshot: {monitor.write_snapshot(args.snapshot)}")
+
+
+if __name__ == "__main__":
+    main()
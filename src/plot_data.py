@@ -0,0 +1,244 @@
+"""
+Dados dos Gráficos
+Histogramas, taxas de conversão, correlações e amostras acumulados bloco a
+bloco: o custo de desenhar não depende do número de leads
+"""
+
+import numpy as np
+import pandas as pd
+
+from scoring_model import LeadScorer
+from storage import default_data_path, iter_leads
+
+TIME_COL = 'Total Time Spent on Website'
+CORR_COLS = ['TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit', 'Converted', 'Lead_Score']
+
+
+class HistogramAccumulator:
+    """
+    Contagens por bin (uma linha por grupo) em bins de largura fixa a partir
+    de lower. Sem upper, o limite é o maior valor do primeiro bloco e dobra
+    (somando bins vizinhos) quando chega um valor maior.
+    """
+
+    def __init__(self, bins=50, lower=0.0, upper=None, n_groups=1):
+        if upper is None and bins % 2:
+            raise ValueError("bins deve ser par quando o limite superior é adaptativo")
+        self.bins = bins
+        self.lower = lower
+        self.upper = upper
+        self.adaptive = upper is None
+        self.counts = np.zeros((n_groups, bins), dtype='int64')
+
+    @property
+    def edges(self):
+        return np.linspace(self.lower, self.upper, self.bins + 1)
+
+    def _grow(self):
+        half = self.counts.reshape(len(self.counts), -1, 2).sum(axis=2)
+        self.counts = np.concatenate([half, np.zeros_like(half)], axis=1)
+        self.upper = self.lower + 2 * (self.upper - self.lower)
+
+    def update(self, values, groups=None):
+        values = np.asarray(values, dtype='float64')
+        groups = np.zeros(len(values), dtype='int64') if groups is None else np.asarray(groups)
+        # +inf faria o histograma adaptativo crescer para sempre
+        valid = np.isfinite(values)
+        values, groups = np.maximum(values[valid], self.lower), groups[valid]
+        if not len(values):
+            return self
+        top = values.max()
+        if self.upper is None:
+            self.upper = top if top > self.lower else self.lower + 1
+        while self.adaptive and top > self.upper:
+            self._grow()
+
+        width = (self.upper - self.lower) / self.bins
+        idx = np.clip(((values - self.lower) / width).astype('int64'), 0, self.bins - 1)
+        np.add.at(self.counts, (groups, idx), 1)
+        return self
+
+    def trimmed(self):
+        """(contagens, bordas) sem os bins vazios à direita deixados pelo crescimento do limite"""
+        used = np.flatnonzero(self.counts.any(axis=0))
+        last = used[-1] + 1 if len(used) else self.bins
+        return self.counts[:, :last], self.edges[:last + 1]
+
+    def density(self):
+        """Contagens normalizadas por grupo (área 1), como density=True no plt.hist"""
+        counts, edges = self.trimmed()
+        totals = counts.sum(axis=1, keepdims=True)
+        return counts / np.maximum(totals, 1) / np.diff(edges), edges
+
+
+class CorrelationAccumulator:
+    """
+    Correlação de Pearson entre pares de colunas com exclusão por par (igual a
+    DataFrame.corr()), a partir de somas acumuladas por bloco
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, df):
+        X = df[self.columns].to_numpy(dtype='float64')
+        if self.shift is None:
+            # Centralizar no primeiro bloco evita cancelamento numérico nas somas
+            self.shift = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(len(self.columns))
+        X = X - self.shift
+        present = ~np.isnan(X)
+        M = present.astype('float64')
+        X = np.where(present, X, 0.0)
+        self.n += M.T @ M
+        self.sx += X.T @ M
+        self.sxx += (X * X).T @ M
+        self.sxy += X.T @ X
+        return self
+
+    def result(self):
+        n, sx, sxx = self.n, self.sx, self.sxx
+        cov = n * self.sxy - sx * sx.T
+        var = (n * sxx - sx * sx) * (n * sxx - sx * sx).T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var)
+        corr[(n < 2) | (var <= 0)] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.columns, columns=self.columns)
+
+
+class RateAccumulator:
+    """Total de leads e convertidos por valor de uma coluna"""
+
+    def __init__(self, column, target='Converted'):
+        self.column = column
+        self.target = target
+        self.sizes = pd.DataFrame(dtype='int64')
+
+    def update(self, df):
+        sizes = df.groupby([self.column, self.target], observed=True).size().unstack(self.target, fill_value=0)
+        sizes.index = sizes.index.astype(object)
+        self.sizes = self.sizes.add(sizes, fill_value=0)
+        return self
+
+    def result(self, min_count=0):
+        """Mesmo formato de LeadStats.conversion_by"""
+        sizes = self.sizes.fillna(0)
+        total = sizes.sum(axis=1)
+        converted = sizes[1] if 1 in sizes.columns else total * 0
+        result = pd.DataFrame({
+            'Total_Leads': total.astype('int64'),
+            'Convertidos': converted.astype('int64'),
+            'Taxa_Conversao': converted / total,
+        })
+        result = result[result['Total_Leads'] >= max(min_count, 1)]
+        return result.sort_values('Taxa_Conversao', ascending=False)
+
+
+class StratifiedReservoir:
+    """
+    Amostra aleatória de até n leads, estratificada por uma coluna, mantida
+    entre blocos (no máximo n linhas por estrato em memória)
+    """
+
+    def __init__(self, n, by='Converted', random_state=42):
+        self.n = n
+        self.by = by
+        self.rng = np.random.default_rng(random_state)
+        self.kept = None
+        self.totals = pd.Series(dtype='int64')
+
+    def update(self, df):
+        df = df.assign(_key=self.rng.random(len(df)))
+        self.totals = self.totals.add(df[self.by].value_counts(), fill_value=0)
+        kept = df if self.kept is None else pd.concat([self.kept, df], ignore_index=True)
+        # Menores chaves aleatórias de cada estrato = amostra uniforme dentro do estrato
+        self.kept = kept.sort_values('_key').groupby(self.by, sort=False).head(self.n)
+        return self
+
+    def sample(self):
+        """Amostra com a proporção de cada estrato igual à dos dados completos"""
+        if self.kept is None:
+            return pd.DataFrame()
+        quota = (self.totals / self.totals.sum() * self.n).round().astype('int64')
+        parts = [group.head(quota.get(value, 0)) for value, group in self.kept.groupby(self.by, sort=False)]
+        return pd.concat(parts).drop(columns='_key').sort_index()
+
+
+class ChartAggregator:
+    """Todos os agregados usados pelos gráficos, atualizados bloco a bloco"""
+
+    def __init__(self, scorer=None, time_bins=50, score_bins=20, sample_size=0, target='Converted'):
+        self.scorer = scorer or LeadScorer()
+        self.target = target
+        self.time = HistogramAccumulator(time_bins, n_groups=2)
+        self.time_sums = np.zeros((2, 2))  # (classe, [soma, contagem])
+        self.score = HistogramAccumulator(score_bins, upper=self.scorer.rules.rules.max_score)
+        self.score_sum = 0.0
+        self.rows = 0
+        self.corr = CorrelationAccumulator(CORR_COLS)
+        self.rates = {'Lead Source': RateAccumulator('Lead Source', target),
+                      'Prioridade': RateAccumulator('Prioridade', target)}
+        self.reservoir = StratifiedReservoir(sample_size, target) if sample_size else None
+
+    def update(self, chunk):
+        if 'Lead_Score' not in chunk.columns or 'Prioridade' not in chunk.columns:
+            chunk = self.scorer.score_leads(chunk.copy())
+        converted = (chunk[self.target] == 1).to_numpy().astype('int64')
+        time = chunk[TIME_COL].to_numpy(dtype='float64')
+
+        self.time.update(time, converted)
+        valid = np.isfinite(time)
+        for cls in (0, 1):
+            mask = valid & (converted == cls)
+            self.time_sums[cls] += (time[mask].sum(), mask.sum())
+
+        scores = chunk['Lead_Score'].to_numpy(dtype='float64')
+        self.score.update(scores)
+        self.score_sum += scores.sum()
+        self.rows += len(chunk)
+
+        self.corr.update(chunk)
+        for rate in self.rates.values():
+            rate.update(chunk)
+        if self.reservoir is not None:
+            self.reservoir.update(chunk)
+        return self
+
+    def result(self, min_count=50):
+        """Agregados finais (pequenos e serializáveis)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.time_sums[:, 0] / self.time_sums[:, 1]
+        time_density, time_edges = self.time.density()
+        result = {
+            'source_conv': self.rates['Lead Source'].result(min_count),
+            'priority_conv': self.rates['Prioridade'].result(),
+            'time_edges': time_edges,
+            'time_density': {'not_converted': time_density[0], 'converted': time_density[1]},
+            'time_mean': {0: means[0], 1: means[1]},
+            'score_edges': self.score.edges,
+            'score_counts': self.score.counts[0],
+            'score_mean': self.score_sum / max(self.rows, 1),
+            'corr': self.corr.result(),
+            'rows': self.rows,
+        }
+        if self.reservoir is not None:
+            result['sample'] = self.reservoir.sample()
+        return result
+
+
+def aggregate_frame(df, **kwargs):
+    """Agregados de um DataFrame já em memória"""
+    return ChartAggregator(**kwargs).update(df).result()
+
+
+def aggregate_file(path=None, columns=None, batch_size=500_000, **kwargs):
+    """Agregados lendo o arquivo (CSV ou Parquet) em blocos"""
+    aggregator = ChartAggregator(**kwargs)
+    for chunk in iter_leads(path or default_data_path(), columns, batch_size):
+        aggregator.update(chunk)
+    return aggregator.result()
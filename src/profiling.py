@@ -0,0 +1,169 @@
+"""
+Instrumentação por Etapa
+Tempo de parede e de CPU, pico de RSS e linhas de entrada/saída de cada etapa
+do pipeline, com relatório em JSON ou no formato textfile do Prometheus
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRIC_PREFIX = 'lead_scoring_stage'
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _reset_peak_rss():
+    """Zera o pico de RSS do processo (Linux >= 4.0); False se não for possível"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Pico de RSS em MB (VmHWM no Linux; ru_maxrss nos demais)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return peak / 1024 / 1024 if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+class StageRecord:
+    """Métricas de uma etapa (rows_out pode ser definido dentro do bloco)"""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_mb = None
+        self.peak_is_stage = False
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_mb': self.peak_rss_mb,
+            'peak_is_stage': self.peak_is_stage,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+        }
+
+
+class StageProfiler:
+    """
+    Mede cada etapa com `with profiler.stage('nome', rows_in=n) as stage`.
+    profile_dir: grava um cProfile (.prof) por etapa, legível por pstats/snakeviz.
+    hooks: funções chamadas com (nome, 'start'|'end'), ex.: marcar janelas de
+    amostragem de um profiler externo como py-spy.
+    """
+
+    def __init__(self, profile_dir=None, hooks=()):
+        self.profile_dir = profile_dir
+        self.hooks = list(hooks)
+        self.records = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = StageRecord(name, rows_in)
+        profile = None
+        if self.profile_dir:
+            import cProfile
+            profile = cProfile.Profile()
+
+        for hook in self.hooks:
+            hook(name, 'start')
+        record.peak_is_stage = _reset_peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.wall_seconds = time.perf_counter() - wall
+            record.cpu_seconds = time.process_time() - cpu
+            record.peak_rss_mb = _peak_rss_mb()
+            self.records.append(record)
+            for hook in self.hooks:
+                hook(name, 'end')
+            if profile is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile.dump_stats(os.path.join(self.profile_dir, f'{name}.prof'))
+
+    def report(self):
+        """Relatório completo (serializável em JSON)"""
+        stages = [record.to_dict() for record in self.records]
+        peaks = [s['peak_rss_mb'] for s in stages if s['peak_rss_mb'] is not None]
+        return {
+            'started_at': self.started_at,
+            'stages': stages,
+            'total': {
+                'wall_seconds': sum(s['wall_seconds'] for s in stages),
+                'cpu_seconds': sum(s['cpu_seconds'] for s in stages),
+                'peak_rss_mb': max(peaks) if peaks else None,
+            },
+        }
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.report(), indent=2, ensure_ascii=False))
+        return path
+
+    def write_prometheus(self, path):
+        """Formato textfile do node_exporter (gravação atômica, como o coletor exige)"""
+        metrics = [
+            ('wall_seconds', 'Tempo de parede da etapa'),
+            ('cpu_seconds', 'Tempo de CPU do processo durante a etapa'),
+            ('peak_rss_mb', 'Pico de memória residente durante a etapa (MB)'),
+            ('rows_in', 'Linhas de entrada da etapa'),
+            ('rows_out', 'Linhas de saída da etapa'),
+        ]
+        lines = []
+        for key, help_text in metrics:
+            name = f'{METRIC_PREFIX}_{key}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for record in self.records:
+                value = getattr(record, key)
+                if value is not None:
+                    lines.append(f'{name}{{stage="{record.name}"}} {value}')
+        _atomic_write(path, '\n'.join(lines) + '\n')
+        return path
+
+    def print_summary(self):
+        print("\n⏱️ TEMPO POR ETAPA:")
+        for record in self.records:
+            rows_in = '-' if record.rows_in is None else f"{record.rows_in:,}"
+            rows_out = '-' if record.rows_out is None else f"{record.rows_out:,}"
+            rows = f"{rows_in} → {rows_out} linhas"
+            peak = f"{record.peak_rss_mb:,.0f} MB" if record.peak_rss_mb is not None else "-"
+            print(f"  {record.name:<26} {record.wall_seconds:7.2f}s parede | "
+                  f"{record.cpu_seconds:7.2f}s CPU | pico {peak} | {rows}")
+
+
+def _atomic_write(path, content):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,63 +1,142 @@
 """
 Modelo de Lead Scoring
 Script para aplicar scoring em novos leads
+(pandas só é importado nos caminhos vetorizados: scorar um lead é rápido de iniciar)
 """
 
-import pandas as pd
-import joblib
+import os
+
+from scoring_rules import default_rules
+from model_store import MODELS_DIR, load_artifact
+
+
+def encode_features(leads_df, features, le_dict):
+    """
+    Matriz de features no formato usado no treino. Categorias nunca vistas viram
+    'Unknown' (ou -1 se o treino não teve 'Unknown'), como em inference.FeatureEncoder.
+    """
+    import numpy as np
+    import pandas as pd
+
+    X = pd.DataFrame(index=leads_df.index)
+    for col in features:
+        values = leads_df[col] if col in leads_df.columns else pd.Series(None, index=leads_df.index)
+        if col in le_dict:
+            classes = le_dict[col].classes_
+            values = values.astype(object).fillna('Unknown').astype(str)
+            codes = pd.Categorical(values, categories=classes).codes
+            unknown = np.flatnonzero(classes == 'Unknown')
+            X[col] = np.where(codes < 0, unknown[0] if len(unknown) else -1, codes).astype(codes.dtype)
+        else:
+            X[col] = pd.to_numeric(values, errors='coerce').fillna(0)
+    return X
+
 
 class LeadScorer:
-    def __init__(self):
+    # Acima disso o percurso compilado do scikit-learn compensa o overhead da chamada
+    FAST_MAX_ROWS = 128
+    
+    def __init__(self, rules=None):
+        """rules: regras compiladas (CompiledRules); padrão em config/scoring_rules.json"""
         self.model = None
+        self.model_version = None
+        self.fast_model = None
+        self.le_dict = {}
+        self.features = []
+        self.rules = rules if rules is not None else default_rules()
         
     def calculate_business_score(self, lead):
         """Calcula score baseado em regras de negócio"""
-        score = 0
-        
-        # Fonte (peso alto)
-        source_scores = {
-            'Welingak Website': 40, 'Reference': 35, 'Google': 20,
-            'Organic Search': 15, 'Direct Traffic': 10, 'Olark Chat': 5
-        }
-        score += source_scores.get(lead.get('Lead Source', ''), 0)
-        
-        # Tempo no site
-        time_spent = lead.get('Total Time Spent on Website', 0) or 0
-        if time_spent > 1000: score += 20
-        elif time_spent > 500: score += 15
-        elif time_spent > 200: score += 10
-        elif time_spent > 0: score += 5
-        
-        # Última atividade
-        activity_scores = {
-            'Had a Phone Conversation': 25, 'SMS Sent': 20,
-            'Email Opened': 10, 'Email Link Clicked': 5
-        }
-        score += activity_scores.get(lead.get('Last Activity', ''), 0)
-        
-        # Visitas
-        visits = lead.get('TotalVisits', 0) or 0
-        if visits > 5: score += 10
-        elif visits > 2: score += 5
-        
-        # Qualidade
-        quality_scores = {'High': 15, 'Medium': 10, 'Low': 5}
-        score += quality_scores.get(lead.get('Lead Quality', ''), 0)
-        
-        return min(score, 100)
+        return self.rules.score_one(lead)
     
     def get_priority(self, score):
         """Define prioridade baseada no score"""
-        if score >= 70: return 'ALTA'
-        elif score >= 50: return 'MÉDIA'
-        elif score >= 30: return 'BAIXA'
-        else: return 'MUITO BAIXA'
+        return self.rules.priority_one(score)
+    
+    def calculate_scores(self, leads_df):
+        """Calcula os scores de um DataFrame inteiro de forma vetorizada"""
+        import pandas as pd
+        return pd.Series(self.rules.score_frame(leads_df), index=leads_df.index, name='Lead_Score')
+    
+    def get_priorities(self, scores):
+        """Define a prioridade de uma série de scores de forma vetorizada"""
+        import pandas as pd
+        return pd.Series(self.rules.priorities(scores), index=scores.index, name='Prioridade')
     
     def score_leads(self, leads_df):
         """Aplica scoring em um DataFrame de leads"""
-        leads_df['Lead_Score'] = leads_df.apply(self.calculate_business_score, axis=1)
-        leads_df['Prioridade'] = leads_df['Lead_Score'].apply(self.get_priority)
+        leads_df['Lead_Score'] = self.calculate_scores(leads_df)
+        leads_df['Prioridade'] = self.get_priorities(leads_df['Lead_Score'])
         return leads_df
+    
+    def load_model(self, version=None, models_dir=MODELS_DIR, mmap_mode='r', fast=True):
+        """
+        Carrega um artefato do repositório de modelos (padrão: versão mais recente).
+        fast: prevê pela floresta achatada (forest.npz, ou montada do modelo se
+        a versão for anterior à exportação) em vez do scikit-learn.
+        """
+        from inference import FastModel
+
+        bundle, metadata = load_artifact(version, models_dir, mmap_mode=mmap_mode)
+        self.model = bundle['model']
+        self.le_dict = bundle['le_dict']
+        self.features = bundle['features']
+        self.model_version = metadata['version']
+        self.fast_model = None
+        if fast:
+            self.fast_model = (FastModel.load(os.path.join(models_dir, self.model_version))
+                               or FastModel.from_sklearn(self.model, self.le_dict, self.features))
+        return self
+    
+    def encode_features(self, leads_df):
+        """Matriz de features no formato usado no treino (categorias desconhecidas viram 'Unknown')"""
+        return encode_features(leads_df, self.features, self.le_dict)
+    
+    def predict_proba(self, leads_df):
+        """Probabilidade de conversão pelo modelo ML (None se não houver modelo)"""
+        if self.model is None:
+            return None
+        if self.fast_model is not None and len(leads_df) <= self.FAST_MAX_ROWS:
+            return self.fast_model.predict_proba(leads_df)
+        return self.model.predict_proba(self.encode_features(leads_df))[:, 1]
+    
+    def predict_proba_records(self, leads):
+        """Probabilidades de uma lista de leads (dicts) sem montar DataFrame"""
+        if self.model is None:
+            return None
+        if self.fast_model is not None and len(leads) <= self.FAST_MAX_ROWS:
+            return self.fast_model.predict_proba_records(leads)
+        import pandas as pd
+        return self.predict_proba(pd.DataFrame.from_records(leads))
+    
+    def score_file(self, path=None, filters=None, extra_columns=('Lead Number',)):
+        """Lê apenas as colunas usadas no scoring (CSV ou Parquet) e aplica o scoring"""
+        from storage import read_leads
+        
+        columns = list(dict.fromkeys(list(extra_columns) + self.rules.input_columns))
+        return self.score_leads(read_leads(path, columns=columns, filters=filters))
+    
+    def promising_leads(self, path=None, min_score=60, extra_columns=('Lead Number',), top_n=None, by=None):
+        """
+        Leads não convertidos com score >= min_score (filtro Converted == 0 na
+        leitura), do maior score para o menor; top_n limita a quantidade (por
+        grupo de `by`, ex.: 'City')
+        """
+        from lead_ranking import top_leads
+        
+        extra_columns = list(extra_columns) + ([by] if by is not None else [])
+        leads = self.score_file(path, filters=[('Converted', '==', 0)], extra_columns=extra_columns)
+        return top_leads(leads, top_n, min_score=min_score, by=by)
+    
+    def score_batch(self, paths, output_dir='data/processed', workers=None, **kwargs):
+        """
+        Scoring multi-core de CSVs grandes: shards por faixa de bytes em um pool
+        de processos, com saída na ordem original (ver streaming.parallel_score_csv)
+        """
+        from streaming import parallel_score_csv
+        
+        return parallel_score_csv(paths, output_dir, workers, use_model=self.model is not None,
+                                  model_version=self.model_version, **kwargs)
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""
+Regras de Scoring
+Especificação declarativa dos pesos do Lead Score e avaliador vetorizado
+"""
+
+import json
+import math
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'scoring_rules.json'
+)
+
+
+@dataclass
+class NumericRule:
+    """Faixas numéricas: points[i] vale quando bins[i-1] < valor <= bins[i]"""
+    bins: List[float]
+    points: List[int]
+
+
+@dataclass
+class ScoringRules:
+    """Especificação das regras de negócio do Lead Score"""
+    categorical: Dict[str, Dict[str, int]]
+    numeric: Dict[str, NumericRule]
+    priority_cutoffs: List[int]
+    priority_labels: List[str]
+    max_score: int = 100
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Cria as regras a partir de um dicionário (formato do JSON)"""
+        rules = cls(
+            categorical={col: dict(table) for col, table in spec['categorical'].items()},
+            numeric={col: NumericRule(list(rule['bins']), list(rule['points']))
+                     for col, rule in spec['numeric'].items()},
+            priority_cutoffs=list(spec['priority']['cutoffs']),
+            priority_labels=list(spec['priority']['labels']),
+            max_score=spec.get('max_score', 100),
+        )
+        rules.validate()
+        return rules
+
+    def to_dict(self):
+        """Serializa as regras no formato do JSON"""
+        return {
+            'max_score': self.max_score,
+            'categorical': self.categorical,
+            'numeric': {col: {'bins': rule.bins, 'points': rule.points}
+                        for col, rule in self.numeric.items()},
+            'priority': {'cutoffs': self.priority_cutoffs, 'labels': self.priority_labels},
+        }
+
+    def validate(self):
+        """Valida a consistência das faixas e cortes de prioridade"""
+        for col, rule in self.numeric.items():
+            if len(rule.points) != len(rule.bins) + 1:
+                raise ValueError(f"Regra '{col}': points deve ter len(bins) + 1 valores")
+            if sorted(rule.bins) != list(rule.bins):
+                raise ValueError(f"Regra '{col}': bins deve estar em ordem crescente")
+        if len(self.priority_labels) != len(self.priority_cutoffs) + 1:
+            raise ValueError("Prioridade: labels deve ter len(cutoffs) + 1 valores")
+        if sorted(self.priority_cutoffs) != list(self.priority_cutoffs):
+            raise ValueError("Prioridade: cutoffs deve estar em ordem crescente")
+
+    def compile(self):
+        """Compila as regras em arrays de lookup e limites de faixas"""
+        return CompiledRules(self)
+
+
+class _CategoricalLookup:
+    """
+    Tabela de pesos compilada: categorias + array de pontos (último = desconhecido).
+    Os arrays (numpy/pandas) só são montados no primeiro uso vetorizado.
+    """
+
+    def __init__(self, column, table):
+        self.column = column
+        self.table = table
+
+    @cached_property
+    def categories(self):
+        import pandas as pd
+        return pd.Index(list(self.table.keys()))
+
+    @cached_property
+    def points(self):
+        import numpy as np
+        return np.append(np.asarray(list(self.table.values()), dtype=np.int64), 0)
+
+    def positions(self, values):
+        """Posição de cada valor na tabela (-1 para valores sem peso)"""
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Remapeia só as categorias e reaproveita os códigos já existentes
+            remap = np.append(self.categories.get_indexer(values.cat.categories), -1)
+            return remap[values.cat.codes.to_numpy()]
+        return self.categories.get_indexer(values)
+
+    def evaluate(self, values):
+        return self.points[self.positions(values)]
+
+
+class _NumericLookup:
+    """Faixas compiladas: limites em float64 + pontos em int64"""
+
+    def __init__(self, column, rule):
+        self.column = column
+        self.bins_list = list(rule.bins)
+        self.points_list = list(rule.points)
+
+    @cached_property
+    def bins(self):
+        import numpy as np
+        return np.asarray(self.bins_list, dtype=np.float64)
+
+    @cached_property
+    def points(self):
+        import numpy as np
+        return np.asarray(self.points_list, dtype=np.int64)
+
+    def evaluate(self, values):
+        import numpy as np
+        import pandas as pd
+
+        x = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+        idx = np.searchsorted(self.bins, x, side='left')
+        idx[np.isnan(x)] = 0
+        return self.points[idx]
+
+    def evaluate_one(self, value):
+        # Mesma conversão do caminho vetorizado (to_numeric com errors='coerce'):
+        # texto numérico vira número, o resto conta como nulo
+        if not isinstance(value, (int, float)):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = math.nan
+        if math.isnan(value):
+            return self.points_list[0]
+        return self.points_list[bisect_left(self.bins_list, value)]
+
+
+class CompiledRules:
+    """Regras compiladas, reutilizadas a cada avaliação (linha ou DataFrame)"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.max_score = rules.max_score
+        self.categorical = [_CategoricalLookup(col, table)
+                            for col, table in rules.categorical.items()]
+        self.numeric = [_NumericLookup(col, rule) for col, rule in rules.numeric.items()]
+        self.input_columns = [lookup.column for lookup in self.categorical + self.numeric]
+
+    @cached_property
+    def priority_cutoffs(self):
+        import numpy as np
+        return np.asarray(self.rules.priority_cutoffs)
+
+    @cached_property
+    def priority_labels(self):
+        import numpy as np
+        return np.asarray(self.rules.priority_labels, dtype=object)
+
+    def score_one(self, lead):
+        """Score de um único lead (dict ou Series)"""
+        score = 0
+        for lookup in self.categorical:
+            score += lookup.table.get(lead.get(lookup.column, ''), 0)
+        for lookup in self.numeric:
+            score += lookup.evaluate_one(lead.get(lookup.column, 0))
+        return min(score, self.max_score)
+
+    def priority_one(self, score):
+        """Prioridade de um único score"""
+        return self.rules.priority_labels[bisect_right(self.rules.priority_cutoffs, score)]
+
+    def score_frame(self, df):
+        """Scores de um DataFrame inteiro (array int64)"""
+        import numpy as np
+
+        score = np.zeros(len(df), dtype=np.int64)
+        for lookup in self.categorical + self.numeric:
+            if lookup.column in df.columns:
+                score += lookup.evaluate(df[lookup.column])
+        return np.minimum(score, self.max_score)
+
+    def priorities(self, scores):
+        """Prioridades de um array de scores"""
+        import numpy as np
+
+        idx = np.searchsorted(self.priority_cutoffs, np.asarray(scores), side='right')
+        return self.priority_labels[idx]
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """Carrega as regras de scoring de um arquivo JSON"""
+    with open(path, encoding='utf-8') as f:
+        return ScoringRules.from_dict(json.load(f))
+
+
+_default_compiled = None
+
+
+def default_rules():
+    """Regras padrão compiladas uma única vez por processo"""
+    global _default_compiled
+    if _default_compiled is None:
+        _default_compiled = load_rules().compile()
+    return _default_compiled
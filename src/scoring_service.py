@@ -0,0 +1,203 @@
+"""
+Serviço de Scoring em Tempo Real
+API HTTP que pontua leads individuais ou micro-lotes com LeadScorer
+
+Endpoints:
+  POST /score   corpo: um lead (objeto JSON), uma lista de leads ou {"leads": [...]}
+  GET  /health  status do serviço
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from model_store import MODELS_DIR, list_versions
+from scoring_model import LeadScorer
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes em um único lote vetorizado.
+    Enquanto um lote é pontuado, as novas requisições se acumulam na fila e
+    formam o próximo lote; max_wait > 0 ainda espera por mais requisições.
+    """
+
+    SMALL_BATCH = 16
+
+    def __init__(self, scorer, max_batch=256, max_wait=0.0):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, leads):
+        """Enfileira uma lista de leads e devolve um Future com os resultados"""
+        future = Future()
+        self._queue.put((leads, future))
+        return future
+
+    def _collect(self):
+        """Bloqueia até a primeira requisição e junta as que já estão na fila (ou chegam na janela)"""
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.score([lead for leads, _ in batch for lead in leads])
+            except Exception:
+                # Um lead inválido não derruba as outras requisições do lote:
+                # cada uma é pontuada de novo e falha (ou não) sozinha
+                for leads, future in batch:
+                    self._resolve(future, leads)
+                continue
+            start = 0
+            for leads, future in batch:
+                future.set_result(results[start:start + len(leads)])
+                start += len(leads)
+
+    def _resolve(self, future, leads):
+        try:
+            future.set_result(self.score(leads))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    def score(self, leads):
+        """Score, prioridade e probabilidade de um lote de leads"""
+        rules = self.scorer.rules
+        proba = None
+        if len(leads) <= self.SMALL_BATCH:
+            # Lotes pequenos: montar um DataFrame custa mais que as regras em Python
+            # e que codificar os leads direto para a floresta achatada
+            scores = [rules.score_one(lead) for lead in leads]
+            priorities = [rules.priority_one(score) for score in scores]
+            if self.scorer.model is not None:
+                proba = self.scorer.predict_proba_records(leads)
+        else:
+            leads_df = pd.DataFrame.from_records(leads)
+            scores = rules.score_frame(leads_df)
+            priorities = rules.priorities(scores)
+            if self.scorer.model is not None:
+                proba = self.scorer.predict_proba(leads_df)
+        return [
+            {
+                'Lead_Score': int(scores[i]),
+                'Prioridade': priorities[i],
+                'probability': None if proba is None else float(proba[i]),
+            }
+            for i in range(len(leads))
+        ]
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Keep-alive + respostas pequenas: sem Nagle para não esperar o ACK atrasado
+    disable_nagle_algorithm = True
+    batcher = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'model': self.batcher.scorer.model_version})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/score':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self._send_json(400, {'error': 'JSON inválido'})
+            return
+
+        if isinstance(payload, dict):
+            single = 'leads' not in payload
+            leads = [payload] if single else payload['leads']
+        else:
+            single, leads = False, payload
+        if not isinstance(leads, list) or not all(isinstance(lead, dict) for lead in leads):
+            self._send_json(400, {'error': 'esperado um lead ou uma lista de leads'})
+            return
+        if not leads:
+            self._send_json(200, [])
+            return
+
+        try:
+            results = self.batcher.submit(leads).result()
+        except (TypeError, ValueError, KeyError) as exc:
+            self._send_json(400, {'error': f'lead inválido: {exc}'})
+            return
+        except Exception as exc:
+            self._send_json(500, {'error': f'erro interno: {exc}'})
+            return
+        self._send_json(200, results[0] if single else results)
+
+    def log_message(self, format, *args):
+        # Sem log por requisição: o custo de I/O pesa na latência
+        pass
+
+
+def create_server(host='127.0.0.1', port=8000, model_version=None, max_batch=256, max_wait=0.0,
+                  models_dir=MODELS_DIR, use_model=True):
+    """Carrega regras e modelo uma única vez e cria o servidor HTTP"""
+    scorer = LeadScorer()
+    if use_model and list_versions(models_dir):
+        scorer.load_model(model_version, models_dir)
+    handler = type('Handler', (ScoringHandler,), {'batcher': MicroBatcher(scorer, max_batch, max_wait)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model-version', help='Versão do modelo (padrão: mais recente em models/)')
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--no-model', action='store_true', help='Somente regras de negócio')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=0.0,
+                        help='Janela extra para acumular requisições em um lote')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.model_version, args.max_batch,
+                           args.max_wait_ms / 1000, args.models_dir, not args.no_model)
+    scorer = server.RequestHandlerClass.batcher.scorer
+    print(f"🚀 Serviço de scoring em http://{args.host}:{args.port}")
+    print(f"🤖 Modelo: {scorer.model_version or 'nenhum (somente regras)'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Motor de Estatísticas de Leads
+Agregações por grupo e por classe (Converted) calculadas em uma única passada
+e reaproveitadas pelo relatório e pelos gráficos
+"""
+
+import pandas as pd
+
+BEHAVIORAL_COLS = ['TotalVisits', 'Total Time Spent on Website', 'Page Views Per Visit']
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+class LeadStats:
+    """
+    Resultado reutilizável das agregações.
+    groups[dim]: estatísticas por (dim, classe) com colunas (coluna, estatística)
+    classes: estatísticas por classe (todas as linhas)
+    """
+
+    def __init__(self, groups, classes, target):
+        self.groups = groups
+        self.classes = classes
+        self.target = target
+
+    def conversion_by(self, dimension, min_count=0):
+        """Total de leads, convertidos e taxa de conversão por valor da dimensão"""
+        sizes = self.groups[dimension]['_size'].unstack(self.target, fill_value=0)
+        sizes = sizes[sizes.index.notna()]
+        total = sizes.sum(axis=1)
+        converted = sizes[1] if 1 in sizes.columns else total * 0
+        result = pd.DataFrame({
+            'Total_Leads': total,
+            'Convertidos': converted,
+            'Taxa_Conversao': converted / total,
+        })
+        result = result[result['Total_Leads'] >= max(min_count, 1)]
+        return result.sort_values('Taxa_Conversao', ascending=False)
+
+    def class_stat(self, column, stat='mean'):
+        """Estatística de uma coluna para convertidos (1) e não convertidos (0)"""
+        return self.classes[(column, stat)]
+
+    def group_stat(self, dimension, column, stat='mean'):
+        """Estatística de uma coluna por (valor da dimensão, classe)"""
+        return self.groups[dimension][(column, stat)].unstack(self.target)
+
+
+def _aggregate(grouped, value_cols, quantiles):
+    """count/sum/mean e quantis de todas as colunas sobre o mesmo agrupamento"""
+    stats = grouped[value_cols].agg(['count', 'sum', 'mean'])
+    for q in quantiles:
+        quantile = grouped[value_cols].quantile(q)
+        for col in value_cols:
+            stats[(col, f'q{int(q * 100)}')] = quantile[col]
+    stats['_size'] = grouped.size()
+    return stats
+
+
+def compute_lead_stats(df, dimensions=('Lead Source',), value_cols=BEHAVIORAL_COLS,
+                       target='Converted', quantiles=DEFAULT_QUANTILES):
+    """Calcula todas as estatísticas pedidas: um agrupamento por dimensão + um por classe"""
+    value_cols = [col for col in value_cols if col in df.columns]
+    groups = {}
+    for dim in dimensions:
+        grouped = df.groupby([dim, target], observed=True, dropna=False, sort=False)
+        groups[dim] = _aggregate(grouped, value_cols, quantiles)
+    classes = _aggregate(df.groupby(target, sort=True), value_cols, quantiles)
+    return LeadStats(groups, classes, target)
@@ -0,0 +1,249 @@
+"""
+Armazenamento Colunar de Leads
+Converte o CSV bruto em um dataset Parquet tipado e particionado
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+import pandas as pd
+
+RAW_CSV_PATH = 'data/Lead_Scoring.csv'
+PARQUET_PATH = 'data/processed/leads.parquet'
+
+# Colunas categóricas de baixa cardinalidade (dictionary encoding no Parquet)
+CATEGORICAL_COLUMNS = ['Lead Origin', 'Lead Source', 'Last Activity', 'Lead Quality']
+
+# Tipos numéricos explícitos; demais colunas são texto
+NUMERIC_DTYPES = {
+    'Lead Number': 'int64',
+    'Converted': 'int64',
+    'TotalVisits': 'float64',
+    'Total Time Spent on Website': 'float64',
+    'Page Views Per Visit': 'float64',
+    'Asymmetrique Activity Score': 'float64',
+    'Asymmetrique Profile Score': 'float64',
+}
+
+PARTITION_COLUMNS = ['Lead Origin']
+
+# Posição original de cada linha no CSV e ordem original das colunas: a leitura
+# do dataset particionado devolve as partições por último e as linhas agrupadas
+ROW_COLUMN = '__row'
+LAYOUT_FILE = '_columns.json'
+
+# Representação compacta em memória: tipos numéricos reduzidos na leitura.
+# Lead Number e Converted são lidos no tipo natural (um export com Converted em
+# branco ou ids acima de 2^31 não falha) e o compact_frame reduz se couber
+COMPACT_NUMERIC_DTYPES = {
+    'TotalVisits': 'float32',
+    'Total Time Spent on Website': 'float32',
+    'Page Views Per Visit': 'float32',
+    'Asymmetrique Activity Score': 'float32',
+    'Asymmetrique Profile Score': 'float32',
+}
+ID_COLUMNS = ['Prospect ID']
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _arrow_schema(columns):
+    """Schema Arrow fixo para que todos os blocos gerem arquivos compatíveis"""
+    import pyarrow as pa
+
+    fields = []
+    for col in columns:
+        if col in NUMERIC_DTYPES or col == ROW_COLUMN:
+            fields.append(pa.field(col, pa.from_numpy_dtype(NUMERIC_DTYPES.get(col, 'int64'))))
+        elif col in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def ingest_csv(csv_path=RAW_CSV_PATH, dest=PARQUET_PATH, partition_cols=PARTITION_COLUMNS,
+               chunksize=500_000):
+    """Converte o CSV bruto (uma única vez) em um dataset Parquet particionado"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if os.path.exists(dest):
+        shutil.rmtree(dest)
+
+    dtypes = dict(NUMERIC_DTYPES)
+    dtypes.update({col: 'category' for col in CATEGORICAL_COLUMNS})
+
+    rows = 0
+    schema = None
+    for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=chunksize):
+        if schema is None:
+            columns = list(chunk.columns)
+            schema = _arrow_schema(columns + [ROW_COLUMN])
+        chunk[ROW_COLUMN] = range(rows, rows + len(chunk))
+        # Partições não podem ter nulos: leads sem origem vão para 'Unknown'
+        for col in partition_cols:
+            chunk[col] = chunk[col].cat.add_categories('Unknown').fillna('Unknown')
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pq.write_to_dataset(table, dest, partition_cols=list(partition_cols))
+        rows += len(chunk)
+
+    # Arquivos com prefixo '_' são ignorados pelo leitor do dataset
+    with open(os.path.join(dest, LAYOUT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(columns, f, ensure_ascii=False)
+    print(f"💾 {rows:,} leads convertidos para Parquet em {dest}")
+    return dest
+
+
+def _apply_filters(df, filters):
+    """Aplica filtros no formato do pyarrow ([(coluna, op, valor), ...]) em pandas"""
+    ops = {
+        '==': lambda s, v: s == v, '!=': lambda s, v: s != v,
+        '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+        '>': lambda s, v: s > v, '>=': lambda s, v: s >= v,
+        'in': lambda s, v: s.isin(v), 'not in': lambda s, v: ~s.isin(v),
+    }
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        mask &= ops[op](df[col], value)
+    return df[mask].reset_index(drop=True)
+
+
+def read_leads(path=None, columns=None, filters=None):
+    """
+    Lê leads do dataset Parquet (ou do CSV bruto) com projeção de colunas.
+    filters segue o formato do pyarrow, ex.: [('Converted', '==', 0)], e é
+    aplicado durante a leitura (predicate pushdown) quando a fonte é Parquet.
+    """
+    path = path or default_data_path()
+    if path.endswith('.csv'):
+        read_cols = None
+        if columns is not None:
+            read_cols = list(dict.fromkeys(list(columns) + [f[0] for f in filters or []]))
+        df = pd.read_csv(path, usecols=read_cols)
+        if filters:
+            df = _apply_filters(df, filters)
+        return df[list(columns)] if columns is not None else df
+
+    layout = _dataset_layout(path)
+    read_cols = None if columns is None else list(columns) + ([ROW_COLUMN] if layout else [])
+    df = pd.read_parquet(path, engine='pyarrow', columns=read_cols, filters=filters)
+    if layout:
+        # Linhas na ordem do CSV original
+        df = df.sort_values(ROW_COLUMN, kind='stable', ignore_index=True)
+    return _restore_layout(df, layout, columns)
+
+
+def _dataset_layout(path):
+    """Ordem original das colunas gravada pelo ingest_csv (None em datasets antigos)"""
+    layout_path = os.path.join(path, LAYOUT_FILE)
+    if not os.path.exists(layout_path):
+        return None
+    with open(layout_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _restore_layout(df, layout, columns=None):
+    """Colunas de partição voltam ao final na leitura; restaura a ordem pedida (ou a do CSV)"""
+    if columns is None:
+        columns = [col for col in layout or df.columns if col in df.columns and col != ROW_COLUMN]
+    return df[list(columns)]
+
+
+def iter_leads(path=None, columns=None, batch_size=500_000):
+    """Lê leads em blocos de até batch_size linhas (memória limitada ao bloco)"""
+    path = path or default_data_path()
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+        return
+
+    import pyarrow.dataset as ds
+
+    layout = _dataset_layout(path)
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    read_cols = columns or [col for col in dataset.schema.names if col != ROW_COLUMN]
+    for batch in dataset.to_batches(columns=read_cols, batch_size=batch_size):
+        if batch.num_rows:
+            yield _restore_layout(batch.to_pandas(), layout, columns)
+
+
+def _downcast(values):
+    """Menor tipo numérico que representa a coluna sem perda"""
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast='integer')
+    if values.notna().all() and (values % 1 == 0).all():
+        return pd.to_numeric(values.astype('int64'), downcast='integer')
+    return values.astype('float32')
+
+
+def compact_frame(df):
+    """
+    Converte o DataFrame para a representação compacta: category para colunas
+    de texto de baixa cardinalidade e int8/int16/float32 para as numéricas.
+    """
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_numeric_dtype(values):
+            df[col] = _downcast(values)
+        elif col not in ID_COLUMNS and values.nunique() <= len(values) * CATEGORY_MAX_RATIO:
+            df[col] = values.astype('category')
+    return df
+
+
+def load_compact(path=None, columns=None, filters=None):
+    """Lê leads já na representação compacta (sem passar por colunas object no CSV)"""
+    path = path or default_data_path()
+    if path.endswith('.csv') and not filters:
+        # Uma amostra decide quais colunas de texto já podem ser lidas como category
+        sample = pd.read_csv(path, nrows=1000)
+        wanted = sample.columns if columns is None else [c for c in sample.columns if c in columns]
+        dtypes = {}
+        for col in wanted:
+            if col in COMPACT_NUMERIC_DTYPES:
+                dtypes[col] = COMPACT_NUMERIC_DTYPES[col]
+            elif col not in ID_COLUMNS and not pd.api.types.is_numeric_dtype(sample[col]):
+                dtypes[col] = 'category'
+        df = pd.read_csv(path, usecols=list(wanted), dtype=dtypes)
+        if columns is not None:
+            df = df[list(columns)]
+    else:
+        df = read_leads(path, columns=columns, filters=filters)
+    return compact_frame(df)
+
+
+def _newest_mtime(path):
+    if not os.path.isdir(path):
+        return os.path.getmtime(path)
+    return max((os.path.getmtime(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names),
+               default=0)
+
+
+def default_data_path():
+    """
+    Dataset Parquet se já foi gerado a partir do CSV atual, senão o CSV bruto
+    (um export novo do CSV deixa o Parquet desatualizado até o próximo ingest)
+    """
+    if not os.path.exists(PARQUET_PATH):
+        return RAW_CSV_PATH
+    if os.path.exists(RAW_CSV_PATH) and os.path.getmtime(RAW_CSV_PATH) > _newest_mtime(PARQUET_PATH):
+        print(f"⚠️ {RAW_CSV_PATH} é mais novo que {PARQUET_PATH}: usando o CSV "
+              f"(rode python src/storage.py para atualizar o Parquet)")
+        return RAW_CSV_PATH
+    return PARQUET_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('csv', nargs='?', default=RAW_CSV_PATH)
+    parser.add_argument('--dest', default=PARQUET_PATH)
+    parser.add_argument('--partition-cols', nargs='*', default=PARTITION_COLUMNS)
+    args = parser.parse_args()
+
+    ingest_csv(args.csv, args.dest, args.partition_cols)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Pipeline de Scoring em Streaming
+Processa exports de leads maiores que a memória em blocos (chunks), em um
+processo ou em shards (faixas de bytes) distribuídos por um pool de processos
+"""
+
+import argparse
+import heapq
+import io
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scoring_model import LeadScorer
+
+# Colunas lidas do CSV (scoring + identificação + relatórios) e seus tipos
+STREAM_DTYPES = {
+    'Lead Number': 'int64',
+    'Lead Origin': 'category',
+    'Lead Source': 'category',
+    'Converted': 'Int8',  # nullable: Converted em branco vira NA em vez de erro
+    'TotalVisits': 'float32',
+    'Total Time Spent on Website': 'float32',
+    'Page Views Per Visit': 'float32',
+    'Last Activity': 'category',
+    'Lead Quality': 'category',
+}
+STREAM_COLUMNS = list(STREAM_DTYPES)
+
+
+class TopLeads:
+    """Mantém os N leads de maior score com um heap de tamanho fixo"""
+
+    def __init__(self, n):
+        self.n = n
+        self.columns = None
+        self._heap = []
+        self._seen = 0
+
+    def push(self, candidates):
+        """Oferece um DataFrame de candidatos (na ordem original do arquivo)"""
+        if self.columns is None:
+            self.columns = list(candidates.columns)
+        # Só os N melhores do bloco podem entrar no heap
+        scores = candidates['Lead_Score'].to_numpy()
+        best = np.argsort(-scores, kind='stable')[:self.n]
+        rows = candidates.iloc[best].itertuples(index=False, name=None)
+        for pos, score, row in zip(best, scores[best], rows):
+            # Empates: o lead que apareceu antes no arquivo tem precedência
+            item = (int(score), -(self._seen + int(pos)), row)
+            if len(self._heap) < self.n:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+            else:
+                break
+        self._seen += len(candidates)
+
+    def to_frame(self):
+        """Top N ordenado por score decrescente"""
+        rows = [row for _, _, row in sorted(self._heap, reverse=True)]
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+def read_chunks(data_path, chunksize=100_000, columns=STREAM_COLUMNS):
+    """Lê o CSV em blocos, apenas com as colunas necessárias e tipos explícitos"""
+    dtypes = {col: STREAM_DTYPES[col] for col in columns if col in STREAM_DTYPES}
+    return pd.read_csv(data_path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+
+def stream_score_csv(data_path, output_dir='data/processed', chunksize=100_000,
+                     min_score=60, top_n=1000, scorer=None):
+    """Aplica scoring bloco a bloco e grava os resultados incrementalmente"""
+    scorer = scorer or LeadScorer()
+    os.makedirs(output_dir, exist_ok=True)
+    scores_path = os.path.join(output_dir, 'leads_with_scores.csv')
+    promising_path = os.path.join(output_dir, 'promising_leads.csv')
+
+    top = TopLeads(top_n)
+    total = converted = score_sum = 0
+    priority_counts = pd.Series(dtype='int64')
+
+    for i, chunk in enumerate(read_chunks(data_path, chunksize)):
+        scorer.score_leads(chunk)
+        chunk.to_csv(scores_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+        mask = chunk['Converted'].isin([0]) & (chunk['Lead_Score'] >= min_score)
+        if mask.any():
+            top.push(chunk[mask])
+
+        total += len(chunk)
+        converted += int(chunk['Converted'].sum())
+        score_sum += int(chunk['Lead_Score'].sum())
+        priority_counts = priority_counts.add(chunk['Prioridade'].value_counts(), fill_value=0)
+
+    promising = top.to_frame()
+    promising.to_csv(promising_path, index=False)
+
+    return _report(total, converted, score_sum, priority_counts, promising, min_score, scores_path, promising_path)
+
+
+def _report(total, converted, score_sum, priority_counts, promising, min_score, scores_path, promising_path):
+    """Resumo impresso ao final do scoring e estatísticas devolvidas"""
+    print(f"📊 Leads processados: {total:,}")
+    if total:
+        print(f"💰 Taxa de conversão: {converted / total:.1%}")
+        print(f"📊 Score médio: {score_sum / total:.1f}/100")
+    print(f"🎯 Top {len(promising)} leads promissores (Score >= {min_score})")
+    print(f"\n💾 Resultados salvos:")
+    print(f"  📁 {scores_path}")
+    print(f"  📁 {promising_path}")
+
+    return {
+        'rows': total,
+        'converted': converted,
+        'priority_counts': priority_counts.astype('int64').to_dict(),
+        'promising': len(promising),
+    }
+
+
+def plan_shards(paths, n_shards):
+    """
+    Divide um ou mais CSVs em faixas de bytes [(arquivo, início, fim)] que
+    começam e terminam em fim de linha (campos com quebra de linha entre aspas
+    não são suportados)
+    """
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    sizes = [os.path.getsize(path) for path in paths]
+    total = sum(sizes) or 1
+    shards = []
+    for path, size in zip(paths, sizes):
+        parts = max(1, round(n_shards * size / total))
+        with open(path, 'rb') as f:
+            bounds = [len(f.readline())]  # o cabeçalho fica fora dos shards
+            for i in range(1, parts):
+                f.seek(max(bounds[0], size * i // parts))
+                f.readline()  # avança até o início da próxima linha
+                bounds.append(max(f.tell(), bounds[-1]))
+            bounds.append(size)
+        shards += [(path, start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return shards
+
+
+def read_range(path, start, end, block_size=64 << 20, columns=STREAM_COLUMNS):
+    """Lê uma faixa de bytes do CSV em blocos de ~block_size, alinhados a fim de linha"""
+    dtypes = {col: STREAM_DTYPES[col] for col in columns if col in STREAM_DTYPES}
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        while f.tell() < end:
+            block = f.read(min(block_size, end - f.tell()))
+            if f.tell() < end and not block.endswith(b'\n'):
+                block += f.readline()
+            yield pd.read_csv(io.BytesIO(header + block), usecols=columns, dtype=dtypes)
+
+
+_worker = {}
+
+
+def _init_worker(model_version, models_dir, use_model):
+    """Carrega regras (e modelo) uma única vez por processo do pool"""
+    scorer = LeadScorer()
+    if use_model:
+        from model_store import MODELS_DIR
+        scorer.load_model(model_version, models_dir or MODELS_DIR)
+    _worker['scorer'] = scorer
+
+
+def score_shard(index, path, start, end, parts_dir, min_score=60, top_n=1000, block_size=64 << 20):
+    """Pontua um shard, grava a parte (sem cabeçalho) e devolve estatísticas e o top N local"""
+    scorer = _worker.get('scorer') or LeadScorer()
+    part_path = os.path.join(parts_dir, f'part-{index:05d}.csv')
+    top = TopLeads(top_n)
+    stats = {'index': index, 'rows': 0, 'converted': 0, 'score_sum': 0, 'columns': None}
+    priority_counts = pd.Series(dtype='int64')
+
+    with open(part_path, 'w', newline='') as out:
+        for chunk in read_range(path, start, end, block_size):
+            scorer.score_leads(chunk)
+            if scorer.model is not None:
+                chunk['probability'] = scorer.predict_proba(chunk)
+            chunk.to_csv(out, header=False, index=False)
+            stats['columns'] = list(chunk.columns)
+
+            mask = chunk['Converted'].isin([0]) & (chunk['Lead_Score'] >= min_score)
+            if mask.any():
+                top.push(chunk[mask])
+            stats['rows'] += len(chunk)
+            stats['converted'] += int(chunk['Converted'].sum())
+            stats['score_sum'] += int(chunk['Lead_Score'].sum())
+            priority_counts = priority_counts.add(chunk['Prioridade'].value_counts(), fill_value=0)
+
+    stats['priority_counts'] = priority_counts
+    stats['top'] = top.to_frame() if top.columns is not None else None
+    return stats
+
+
+def parallel_score_csv(paths, output_dir='data/processed', workers=None, min_score=60, top_n=1000,
+                       block_size=64 << 20, shards_per_worker=4, model_version=None, models_dir=None,
+                       use_model=False):
+    """
+    Scoring em lote multi-core: divide os CSVs em shards, pontua cada shard em
+    um processo do pool e junta as partes na ordem original do arquivo. O
+    resultado é idêntico ao de stream_score_csv (mesmo arquivo e mesmo top N).
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    scores_path = os.path.join(output_dir, 'leads_with_scores.csv')
+    promising_path = os.path.join(output_dir, 'promising_leads.csv')
+    parts_dir = os.path.join(output_dir, '.parts')
+    os.makedirs(parts_dir, exist_ok=True)
+
+    if use_model and model_version is None:
+        # Resolve a versão uma vez: todos os processos usam o mesmo modelo
+        from model_store import MODELS_DIR, list_versions
+        versions = list_versions(models_dir or MODELS_DIR)
+        if not versions:
+            raise FileNotFoundError(f"Nenhum modelo salvo em {models_dir or MODELS_DIR}/")
+        model_version = versions[-1]
+
+    shards = plan_shards(paths, workers * shards_per_worker)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_version, models_dir, use_model)) as pool:
+        futures = [pool.submit(score_shard, i, path, start, end, parts_dir, min_score, top_n, block_size)
+                   for i, (path, start, end) in enumerate(shards)]
+        results = [future.result() for future in futures]
+
+    # Merge determinístico: cabeçalho + partes na ordem dos shards
+    columns = next((r['columns'] for r in results if r['columns']), STREAM_COLUMNS)
+    with open(scores_path, 'w', newline='') as out:
+        out.write(pd.DataFrame(columns=columns).to_csv(index=False))
+        for result in results:
+            part_path = os.path.join(parts_dir, f"part-{result['index']:05d}.csv")
+            with open(part_path) as part:
+                shutil.copyfileobj(part, out, 16 << 20)
+    shutil.rmtree(parts_dir)
+
+    # Top N global: os tops locais entram na ordem dos shards (empates seguem a ordem do arquivo)
+    top = TopLeads(top_n)
+    for result in results:
+        if result['top'] is not None and len(result['top']):
+            top.push(result['top'])
+    promising = top.to_frame() if top.columns is not None else pd.DataFrame(columns=columns)
+    promising.to_csv(promising_path, index=False)
+
+    total = sum(r['rows'] for r in results)
+    converted = sum(r['converted'] for r in results)
+    score_sum = sum(r['score_sum'] for r in results)
+    priority_counts = pd.Series(dtype='int64')
+    for result in results:
+        priority_counts = priority_counts.add(result['priority_counts'], fill_value=0)
+
+    print(f"🧩 {len(shards)} shards em {workers} processos")
+    summary = _report(total, converted, score_sum, priority_counts, promising, min_score, scores_path, promising_path)
+    summary['shards'] = len(shards)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('data', nargs='*', default=['data/Lead_Scoring.csv'])
+    parser.add_argument('--output-dir', default='data/processed')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--min-score', type=int, default=60)
+    parser.add_argument('--top-n', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processos para scoring em shards (padrão: um processo, em streaming)')
+    parser.add_argument('--with-model', action='store_true', help='Inclui a probabilidade do modelo (modo shards)')
+    args = parser.parse_args()
+
+    if args.workers or len(args.data) > 1 or args.with_model:
+        parallel_score_csv(args.data, args.output_dir, args.workers, args.min_score, args.top_n,
+                           use_model=args.with_model)
+    else:
+        stream_score_csv(args.data[0], args.output_dir, args.chunksize, args.min_score, args.top_n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Gerador de Leads Sintéticos
+Gera datasets com o mesmo schema do CSV real em qualquer volume (100k, 1M,
+10M...), preservando as distribuições de cada coluna por classe (Converted)
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import ID_COLUMNS, RAW_CSV_PATH
+
+SYNTHETIC_DIR = 'data/synthetic'
+TARGET = 'Converted'
+KEY = 'Lead Number'
+
+
+class LeadProfile:
+    """
+    Distribuição empírica de cada coluna condicionada à classe. Cada coluna é
+    amostrada de forma independente dada a classe: marginais, taxas de
+    conversão por categoria e médias por classe batem com os dados reais (as
+    correlações entre colunas de uma mesma classe não são preservadas).
+    """
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.dtypes = df.dtypes
+        self.rate = float(df[TARGET].mean())
+        self.key_start = int(df[KEY].max()) + 1 if KEY in df.columns else 1
+        self.categories = {}
+        self.values = {0: {}, 1: {}}
+        for col in self.columns:
+            if col in ID_COLUMNS or col in (KEY, TARGET):
+                continue
+            if pd.api.types.is_numeric_dtype(df[col]):
+                for cls in (0, 1):
+                    self.values[cls][col] = df.loc[df[TARGET] == cls, col].to_numpy()
+            else:
+                cat = df[col].astype('category')
+                self.categories[col] = cat.cat.categories
+                codes = cat.cat.codes.to_numpy()
+                for cls in (0, 1):
+                    self.values[cls][col] = codes[(df[TARGET] == cls).to_numpy()]
+
+    @classmethod
+    def from_csv(cls, path=RAW_CSV_PATH):
+        return cls(pd.read_csv(path))
+
+    def sample(self, n, rng, offset=0):
+        """n leads sintéticos; offset continua a numeração de Lead Number entre blocos"""
+        converted = (rng.random(n) < self.rate).astype('int64')
+        masks = {cls: converted == cls for cls in (0, 1)}
+        data = {}
+        for col in self.columns:
+            if col == TARGET:
+                data[col] = converted
+            elif col == KEY:
+                data[col] = np.arange(self.key_start + offset, self.key_start + offset + n, dtype='int64')
+            elif col in ID_COLUMNS:
+                data[col] = _random_ids(n, rng)
+            else:
+                values = self.values[0][col]
+                out = np.empty(n, dtype=values.dtype)
+                for cls, mask in masks.items():
+                    source = self.values[cls][col]
+                    out[mask] = source[rng.integers(0, len(source), mask.sum())]
+                if col in self.categories:
+                    out = pd.Categorical.from_codes(out, self.categories[col])
+                data[col] = out
+        return pd.DataFrame(data, columns=self.columns)
+
+
+def _random_ids(n, rng):
+    """Identificadores únicos no formato UUID (aleatórios, reprodutíveis pela seed)"""
+    raw = rng.integers(0, 2 ** 63, size=(n, 2), dtype=np.int64).view(np.uint64)
+    hexes = np.char.add(np.char.mod('%016x', raw[:, 0]), np.char.mod('%016x', raw[:, 1]))
+    return [f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}' for h in hexes.tolist()]
+
+
+def generate_leads(n, profile=None, seed=42, chunksize=1_000_000):
+    """Gera n leads em blocos de até chunksize linhas (memória limitada ao bloco)"""
+    profile = profile or LeadProfile.from_csv()
+    rng = np.random.default_rng(seed)
+    for offset in range(0, n, chunksize):
+        yield profile.sample(min(chunksize, n - offset), rng, offset)
+
+
+def synthetic_path(n, fmt='csv', output_dir=SYNTHETIC_DIR, seed=42):
+    name = f'leads_{n}_s{seed}'
+    return os.path.join(output_dir, f'{name}.csv' if fmt == 'csv' else f'{name}.parquet')
+
+
+def write_synthetic(n, fmt='csv', output_dir=SYNTHETIC_DIR, seed=42, chunksize=1_000_000, force=False):
+    """
+    Grava o dataset sintético (CSV ou Parquet particionado como o real) e
+    retorna o caminho. Reaproveita o arquivo se já existir (mesmo n e seed).
+    """
+    path = synthetic_path(n, fmt, output_dir, seed)
+    if os.path.exists(path) and not force:
+        return path
+    os.makedirs(output_dir, exist_ok=True)
+
+    tmp_path = path + '.tmp'
+    if fmt == 'csv':
+        for i, chunk in enumerate(generate_leads(n, seed=seed, chunksize=chunksize)):
+            chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        os.replace(tmp_path, path)
+    else:
+        from storage import ingest_csv
+
+        # Mesmo schema e particionamento do dataset Parquet real
+        csv_path = write_synthetic(n, 'csv', output_dir, seed, chunksize)
+        ingest_csv(csv_path, path, chunksize=chunksize)
+
+    print(f"🧪 {n:,} leads sintéticos em {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('rows', type=int, nargs='+', help='Ex.: 100000 1000000 10000000')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output-dir', default=SYNTHETIC_DIR)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--force', action='store_true', help='Regrava mesmo se o arquivo existir')
+    args = parser.parse_args()
+
+    for n in args.rows:
+        write_synthetic(n, args.format, args.output_dir, args.seed, args.chunksize, args.force)
+
+
+if __name__ == "__main__":
+    main()
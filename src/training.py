@@ -0,0 +1,58 @@
+"""
+Treino Paralelo e Incremental
+Random Forest com todos os núcleos, adição de árvores por warm start e
+parada antecipada quando o AUC out-of-bag estabiliza
+"""
+
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+
+def oob_auc(model, y):
+    """AUC out-of-bag (ignora amostras que ainda não ficaram fora de nenhuma árvore)"""
+    proba = model.oob_decision_function_[:, 1]
+    mask = ~np.isnan(proba)
+    return roc_auc_score(np.asarray(y)[mask], proba[mask])
+
+
+def fit_forest_early_stopping(X, y, step=25, max_trees=500, tol=1e-3, patience=2,
+                              n_jobs=-1, random_state=42, **params):
+    """
+    Cresce a floresta de step em step árvores (warm start, todos os núcleos) e
+    para quando o AUC OOB melhora menos que tol por patience rodadas seguidas.
+    Retorna o modelo e o histórico [(n_árvores, auc_oob, segundos)].
+    """
+    model = RandomForestClassifier(n_estimators=0, warm_start=True, oob_score=True, bootstrap=True,
+                                   n_jobs=n_jobs, random_state=random_state, **params)
+    history = []
+    best_auc, stale = -np.inf, 0
+    while model.n_estimators < max_trees:
+        model.set_params(n_estimators=min(model.n_estimators + step, max_trees))
+        start = time.perf_counter()
+        model.fit(X, y)
+        auc = oob_auc(model, y)
+        history.append((model.n_estimators, auc, time.perf_counter() - start))
+
+        if auc > best_auc + tol:
+            best_auc, stale = auc, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+    return model, history
+
+
+def add_trees(model, X_new, y_new, n_trees=25):
+    """
+    Adiciona n_trees árvores treinadas só com os leads novos (warm start).
+    As árvores existentes são mantidas; o OOB é desligado porque as amostras
+    das árvores antigas não fazem parte de X_new.
+    """
+    if not np.array_equal(np.unique(y_new), model.classes_):
+        raise ValueError("Os leads novos precisam conter todas as classes do treino")
+    model.set_params(n_estimators=len(model.estimators_) + n_trees, warm_start=True, oob_score=False)
+    model.fit(X_new, y_new)
+    return model
@@ -0,0 +1,192 @@
+"""
+Busca de Hiperparâmetros
+Validação cruzada estratificada em paralelo (processos), folds codificados em
+cache e eliminação de candidatos por successive halving
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from lead_scoring_analysis import ML_FEATURES, build_feature_matrix
+from model_store import frame_fingerprint
+from storage import default_data_path, load_compact
+
+CACHE_DIR = 'data/processed/tuning_cache'
+LEADERBOARD_PATH = 'data/processed/tuning_leaderboard.csv'
+
+MODELS = {
+    'random_forest': RandomForestClassifier,
+    'hist_gradient_boosting': HistGradientBoostingClassifier,
+}
+
+
+def default_search_space():
+    """Candidatos padrão: grade pequena de Random Forest e HistGradientBoosting"""
+    candidates = []
+    for n_estimators, max_depth, min_samples_leaf in product([100, 200], [None, 10, 20], [1, 5]):
+        candidates.append(('random_forest', {
+            'n_estimators': n_estimators, 'max_depth': max_depth,
+            'min_samples_leaf': min_samples_leaf, 'random_state': 42, 'n_jobs': 1,
+        }))
+    for learning_rate, max_leaf_nodes in product([0.05, 0.1], [15, 31]):
+        candidates.append(('hist_gradient_boosting', {
+            'learning_rate': learning_rate, 'max_leaf_nodes': max_leaf_nodes,
+            'max_iter': 200, 'random_state': 42,
+        }))
+    return candidates
+
+
+def _stratified_order(indices, y, rng):
+    """Ordena os índices de treino de forma que qualquer prefixo mantenha a proporção das classes"""
+    indices = rng.permutation(indices)
+    rank = np.empty(len(indices))
+    for label in np.unique(y[indices]):
+        mask = y[indices] == label
+        rank[mask] = (np.arange(mask.sum()) + 0.5) / mask.sum()
+    return indices[np.argsort(rank, kind='stable')]
+
+
+def prepare_folds(df, n_splits=5, cache_dir=CACHE_DIR, random_state=42):
+    """
+    Codifica as features e calcula os folds uma única vez; grava X, y e os
+    índices em .npy (reutilizados por todos os candidatos e processos).
+    """
+    key = frame_fingerprint(df[ML_FEATURES + ['Converted']], base=f'{n_splits}-{random_state}')[:16]
+    path = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(path, 'done')):
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    X, _ = build_feature_matrix(df)
+    X = X.to_numpy(dtype=np.float32)
+    y = df['Converted'].to_numpy()
+    np.save(os.path.join(path, 'X.npy'), X)
+    np.save(os.path.join(path, 'y.npy'), y)
+
+    rng = np.random.default_rng(random_state)
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (train_idx, test_idx) in enumerate(skf.split(X, y)):
+        np.save(os.path.join(path, f'train_{fold}.npy'), _stratified_order(train_idx, y, rng))
+        np.save(os.path.join(path, f'test_{fold}.npy'), test_idx)
+    open(os.path.join(path, 'done'), 'w').close()
+    return path
+
+
+_loaded = {}
+
+
+def _load_cache(path):
+    """Cache por processo: arrays abertos com mmap (as páginas são compartilhadas pelo SO)"""
+    if path not in _loaded:
+        _loaded[path] = (np.load(os.path.join(path, 'X.npy'), mmap_mode='r'),
+                         np.load(os.path.join(path, 'y.npy'), mmap_mode='r'))
+    return _loaded[path]
+
+
+def evaluate(path, fold, model_name, params, fraction):
+    """Treina um candidato em uma fração do treino de um fold e mede o AUC no teste"""
+    X, y = _load_cache(path)
+    train_idx = np.load(os.path.join(path, f'train_{fold}.npy'))
+    test_idx = np.load(os.path.join(path, f'test_{fold}.npy'))
+    train_idx = train_idx[:max(2, int(len(train_idx) * fraction))]
+
+    model = MODELS[model_name](**params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    auc = roc_auc_score(y[test_idx], model.predict_proba(X[test_idx])[:, 1])
+    return auc, fit_seconds, len(train_idx)
+
+
+def successive_halving(candidates, path, n_splits=5, eta=3, workers=None):
+    """
+    Avalia os candidatos em rodadas: cada rodada usa eta vezes mais dados de
+    treino e mantém só o melhor 1/eta dos candidatos (por AUC médio no k-fold).
+    """
+    n_rungs = int(math.log(len(candidates), eta) + 1e-9) + 1
+    alive = list(range(len(candidates)))
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rung in range(n_rungs):
+            fraction = eta ** (rung - n_rungs + 1)
+            futures = {
+                (i, fold): pool.submit(evaluate, path, fold, *candidates[i], fraction)
+                for i in alive for fold in range(n_splits)
+            }
+            results = []
+            for i in alive:
+                aucs, fits, n_train = zip(*(futures[(i, fold)].result() for fold in range(n_splits)))
+                name, params = candidates[i]
+                results.append((np.mean(aucs), i))
+                rows.append({
+                    'model': name,
+                    'params': json.dumps(params, sort_keys=True),
+                    'rung': rung,
+                    'train_fraction': fraction,
+                    'train_rows': int(np.mean(n_train)),
+                    'mean_auc': float(np.mean(aucs)),
+                    'std_auc': float(np.std(aucs)),
+                    'fit_seconds': float(np.sum(fits)),
+                })
+            results.sort(reverse=True)
+            print(f"  Rodada {rung + 1}/{n_rungs}: {len(alive)} candidatos, "
+                  f"{fraction:.0%} do treino, melhor AUC {results[0][0]:.4f}")
+            if rung < n_rungs - 1:
+                alive = [i for _, i in results[:max(1, math.ceil(len(alive) / eta))]]
+
+    leaderboard = pd.DataFrame(rows)
+    # Quem chegou mais longe vem primeiro; dentro da rodada, maior AUC
+    last = leaderboard.sort_values('rung').groupby(['model', 'params'], sort=False).tail(1)
+    last = last.sort_values(['rung', 'mean_auc'], ascending=[False, False]).reset_index(drop=True)
+    last.insert(0, 'rank', range(1, len(last) + 1))
+    return last, leaderboard
+
+
+def run_search(data_path=None, n_splits=5, eta=3, workers=None, candidates=None,
+               output=LEADERBOARD_PATH, cache_dir=CACHE_DIR):
+    """Executa a busca completa e grava o leaderboard (com tempos) em CSV"""
+    df = load_compact(data_path or default_data_path(), columns=ML_FEATURES + ['Converted'])
+    candidates = candidates or default_search_space()
+
+    start = time.perf_counter()
+    path = prepare_folds(df, n_splits, cache_dir)
+    print(f"🗂️ Folds em cache: {path} ({time.perf_counter() - start:.2f}s)")
+
+    print(f"🔎 {len(candidates)} candidatos, {n_splits} folds, eta={eta}")
+    leaderboard, history = successive_halving(candidates, path, n_splits, eta, workers)
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    leaderboard.to_csv(output, index=False)
+    history.to_csv(output.replace('.csv', '_rounds.csv'), index=False)
+    best = leaderboard.iloc[0]
+    print(f"\n🏆 Melhor: {best['model']} {best['params']} (AUC {best['mean_auc']:.4f} ± {best['std_auc']:.4f})")
+    print(f"⏱️ Tempo total: {time.perf_counter() - start:.1f}s")
+    print(f"💾 Leaderboard: {output}")
+    return leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=None)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=LEADERBOARD_PATH)
+    args = parser.parse_args()
+
+    run_search(args.data, args.folds, args.eta, args.workers, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
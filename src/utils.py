@@ -2,42 +2,51 @@
 Funções utilitárias para análise de leads
 """
 
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from plot_data import HistogramAccumulator
+from stats_engine import compute_lead_stats
 
-def create_conversion_charts(df):
-    """Cria gráficos de conversão"""
+def create_conversion_charts(df, stats=None):
+    """Cria gráficos de conversão (stats: LeadStats já calculado, com 'Lead Source' e 'Prioridade')"""
+    import matplotlib.pyplot as plt
+    
+    if stats is None or not {'Lead Source', 'Prioridade'} <= set(stats.groups):
+        stats = compute_lead_stats(df, ['Lead Source', 'Prioridade'])
+    
     plt.style.use('seaborn-v0_8')
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     
     # 1. Conversão por fonte
-    source_conv = df.groupby('Lead Source')['Converted'].agg(['count', 'mean']).reset_index()
-    source_conv = source_conv[source_conv['count'] >= 50].sort_values('mean', ascending=False)
+    source_conv = stats.conversion_by('Lead Source', min_count=50)
     
-    axes[0,0].bar(range(len(source_conv)), source_conv['mean'])
+    axes[0,0].bar(range(len(source_conv)), source_conv['Taxa_Conversao'])
     axes[0,0].set_title('Taxa de Conversão por Fonte')
     axes[0,0].set_xticks(range(len(source_conv)))
-    axes[0,0].set_xticklabels(source_conv['Lead Source'], rotation=45)
+    axes[0,0].set_xticklabels(source_conv.index, rotation=45)
     axes[0,0].set_ylabel('Taxa de Conversão')
     
-    # 2. Distribuição de tempo no site
-    axes[0,1].hist(df[df['Converted']==1]['Total Time Spent on Website'], 
-                   alpha=0.7, label='Convertidos', bins=30)
-    axes[0,1].hist(df[df['Converted']==0]['Total Time Spent on Website'], 
-                   alpha=0.7, label='Não Convertidos', bins=30)
+    # 2. Distribuição de tempo no site (contagens pré-agregadas, não as linhas)
+    time_hist = HistogramAccumulator(30, n_groups=2)
+    time_hist.update(df['Total Time Spent on Website'], (df['Converted'] == 1).astype(int))
+    edges = time_hist.edges
+    axes[0,1].hist(edges[:-1], bins=edges, weights=time_hist.counts[1], alpha=0.7, label='Convertidos')
+    axes[0,1].hist(edges[:-1], bins=edges, weights=time_hist.counts[0], alpha=0.7, label='Não Convertidos')
     axes[0,1].set_title('Distribuição: Tempo no Site')
     axes[0,1].set_xlabel('Tempo (segundos)')
     axes[0,1].legend()
     
     # 3. Score distribution
-    axes[1,0].hist(df['Lead_Score'], bins=20, edgecolor='black')
+    score_hist = HistogramAccumulator(20, upper=100)
+    score_hist.update(df['Lead_Score'])
+    edges = score_hist.edges
+    axes[1,0].hist(edges[:-1], bins=edges, weights=score_hist.counts[0], edgecolor='black')
     axes[1,0].set_title('Distribuição dos Lead Scores')
     axes[1,0].set_xlabel('Lead Score')
     axes[1,0].set_ylabel('Frequência')
     
     # 4. Conversão por prioridade
-    priority_conv = df.groupby('Prioridade')['Converted'].mean().sort_values(ascending=False)
+    priority_conv = stats.conversion_by('Prioridade')['Taxa_Conversao']
     axes[1,1].bar(priority_conv.index, priority_conv.values)
     axes[1,1].set_title('Taxa de Conversão por Prioridade')
     axes[1,1].set_ylabel('Taxa de Conversão')
@@ -46,10 +55,38 @@ def create_conversion_charts(df):
     plt.savefig('images/visualizations/conversion_analysis.png', dpi=300, bbox_inches='tight')
     plt.show()
 
-def generate_lead_report(df, lead_id):
-    """Gera relatório detalhado de um lead específico"""
-    lead = df[df['Lead Number'] == lead_id].iloc[0]
-    
+class LeadIndex:
+    """Índice de leads por 'Lead Number' (lookup O(1) em vez de varrer a coluna)"""
+    
+    def __init__(self, df, key='Lead Number'):
+        self.df = df
+        self.key = key
+        self.positions = dict(zip(df[key].tolist(), range(len(df))))
+    
+    def __contains__(self, lead_id):
+        return lead_id in self.positions
+    
+    def get(self, lead_id):
+        """Dados de um lead como dicionário (KeyError se não existir)"""
+        return self.df.iloc[self.positions[lead_id]].to_dict()
+    
+    def iter_leads(self, lead_ids, chunksize=1000):
+        """Percorre vários leads em blocos, sem montar uma Series por linha"""
+        positions = [self.positions[lead_id] for lead_id in lead_ids]
+        for start in range(0, len(positions), chunksize):
+            chunk = self.df.iloc[positions[start:start + chunksize]]
+            yield from chunk.to_dict('records')
+
+def generate_lead_report(df, lead_id, index=None):
+    """Gera relatório detalhado de um lead específico (index: LeadIndex para lookup O(1))"""
+    if index is not None:
+        lead = index.get(lead_id)
+    else:
+        lead = df[df['Lead Number'] == lead_id].iloc[0]
+    return render_lead_report(lead, lead_id)
+
+def render_lead_report(lead, lead_id):
+    """Monta o texto do relatório a partir dos dados do lead"""
     report = f"""
     📋 RELATÓRIO DO LEAD #{lead_id}
     {'='*40}
@@ -90,3 +127,39 @@ def generate_lead_report(df, lead_id):
         report += "🔄 Requalificar ou mover para nurturing"
     
     return report
+
+def write_lead_reports(df, output, lead_ids=None, priority='ALTA', index=None):
+    """
+    Gera relatórios em lote: para lead_ids ou, se omitido, para todos os leads
+    da prioridade informada. output terminado em '/' (ou diretório existente)
+    recebe um arquivo por lead; caso contrário, tudo vai para um único arquivo.
+    Os relatórios são gravados à medida que são gerados.
+    """
+    index = index or LeadIndex(df)
+    if lead_ids is None:
+        lead_ids = df.loc[df['Prioridade'] == priority, 'Lead Number'].tolist()
+    
+    per_lead = output.endswith(os.sep) or os.path.isdir(output)
+    if per_lead:
+        os.makedirs(output, exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        out = open(output, 'w', encoding='utf-8')
+    
+    count = 0
+    try:
+        for lead_id, lead in zip(lead_ids, index.iter_leads(lead_ids)):
+            report = render_lead_report(lead, lead_id)
+            if per_lead:
+                with open(os.path.join(output, f'lead_{lead_id}.txt'), 'w', encoding='utf-8') as f:
+                    f.write(report)
+            else:
+                out.write(report)
+                out.write('\n')
+            count += 1
+    finally:
+        if not per_lead:
+            out.close()
+    
+    print(f"📋 {count:,} relatórios gerados em {output}")
+    return count
@@ -0,0 +1,33 @@
+"""
+Testes do scoring incremental
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from incremental import IncrementalScorer
+
+
+def test_duplicate_lead_numbers_in_state(tmp_path):
+    scorer = IncrementalScorer(state_path=str(tmp_path / 'state.parquet'))
+    leads = pd.DataFrame({
+        'Lead Number': [1, 2],
+        'Lead Source': ['Google', 'Reference'],
+        'Total Time Spent on Website': [0, 1200],
+    })
+    first, _ = scorer.score(leads)
+
+    # Estado gravado com um Lead Number repetido: a última linha é a atual
+    state = pd.read_parquet(scorer.state_path)
+    stale = state.iloc[[1]].assign(input_hash=0, Lead_Score=0)
+    state = pd.concat([stale, state], ignore_index=True)
+    state.to_parquet(scorer.state_path, index=False)
+    assert scorer.load_state()['Lead Number'].tolist() == [1, 2]
+
+    second, delta = scorer.score(pd.concat([leads, leads.iloc[[0]]], ignore_index=True))
+    assert second['Lead_Score'].tolist() == first['Lead_Score'].tolist() + first['Lead_Score'].tolist()[:1]
+    assert delta.empty
+    assert sorted(scorer.load_state()['Lead Number']) == [1, 2]
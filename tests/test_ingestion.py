@@ -0,0 +1,107 @@
+"""
+Testes da ingestão contínua com monitoramento
+"""
+
+import asyncio
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ingestion import IngestionPipeline, directory_source
+from monitoring import DriftReference, RollingMonitor
+from scoring_model import LeadScorer
+
+
+async def _events(leads):
+    for lead in leads:
+        yield lead
+
+
+def _reference():
+    return DriftReference.from_frame(pd.DataFrame({
+        'Lead Source': ['Google', 'Reference', 'Google', 'Olark Chat'],
+        'Lead Origin': ['Landing Page Submission', 'Lead Add Form', 'API', 'API'],
+        'TotalVisits': [1.0, 3.0, 6.0, 0.0],
+        'Page Views Per Visit': [1.0, 2.0, 3.0, 0.0],
+        'Total Time Spent on Website': [100, 600, 1200, 0],
+    }))
+
+
+def test_labeled_events_reach_monitor(tmp_path):
+    leads = [
+        {'Lead Source': 'Reference', 'Lead Quality': 'High in Relevance', 'Total Time Spent on Website': 1200,
+         'TotalVisits': 6, 'Page Views Per Visit': 3, 'Lead Origin': 'Lead Add Form', 'Converted': 1},
+        {'Lead Source': 'Reference', 'Lead Quality': 'High in Relevance', 'Total Time Spent on Website': 1100,
+         'TotalVisits': 7, 'Page Views Per Visit': 2, 'Lead Origin': 'Lead Add Form', 'Converted': 0},
+        {'Lead Source': 'Google', 'Lead Origin': 'API', 'Converted': 0},
+        {'Lead Source': 'Google', 'Lead Origin': 'API'},
+    ]
+    monitor = RollingMonitor(_reference())
+    pipeline = IngestionPipeline(LeadScorer(), str(tmp_path / 'events.csv'), max_wait=0.01, monitor=monitor)
+
+    asyncio.run(pipeline.run(_events(leads)))
+    snapshot = monitor.snapshot()
+
+    scored = pd.read_csv(tmp_path / 'events.csv')
+    by_priority = {p: kpi for p, kpi in snapshot['by_priority'].items() if kpi['leads']}
+    assert snapshot['leads'] == 4
+    assert sum(kpi['labeled'] for kpi in by_priority.values()) == 3
+    for priority, kpi in by_priority.items():
+        rows = scored[(scored['Prioridade'] == priority) & scored['Converted'].notna()]
+        assert kpi['labeled'] == len(rows)
+        assert kpi['conversion_rate'] == (rows['Converted'].mean() if len(rows) else None)
+    assert snapshot['by_source']['Reference']['conversion_rate'] == 0.5
+    # Features de drift chegam ao monitor mesmo sem modelo carregado
+    assert snapshot['feature_psi']['Page Views Per Visit']['value'] is not None
+    assert snapshot['feature_psi']['Lead Origin']['value'] is not None
+
+
+def test_invalid_lines_are_skipped_and_file_leaves_queue(tmp_path):
+    incoming = tmp_path / 'incoming'
+    incoming.mkdir()
+    (incoming / 'events.jsonl').write_text(
+        '{"Lead Source": "Google"}\n{quebrado\n[{"Lead Source": "Reference"}, 3]\n', encoding='utf-8')
+    pipeline = IngestionPipeline(LeadScorer(), str(tmp_path / 'events.csv'), max_wait=0.01,
+                                 dead_letter_path=str(tmp_path / 'dead.jsonl'))
+
+    stats = asyncio.run(pipeline.run(directory_source(str(incoming), once=True)))
+
+    assert (stats.received, stats.invalid, stats.written) == (2, 2, 2)
+    assert len((tmp_path / 'dead.jsonl').read_text(encoding='utf-8').splitlines()) == 2
+    assert not (incoming / 'events.jsonl').exists()
+    assert (incoming / 'done' / 'events.jsonl').exists()
+
+
+def test_failed_stage_stops_pipeline(tmp_path):
+    class BrokenScorer(LeadScorer):
+        def score_leads(self, leads_df):
+            raise RuntimeError('scoring quebrado')
+
+    async def endless():
+        while True:
+            yield {'Lead Source': 'Google'}
+            await asyncio.sleep(0)
+
+    pipeline = IngestionPipeline(BrokenScorer(), str(tmp_path / 'events.csv'), max_batch=10, max_pending=20)
+    with pytest.raises(RuntimeError, match='scoring quebrado'):
+        asyncio.run(asyncio.wait_for(pipeline.run(endless()), timeout=10))
+
+
+def test_output_keeps_existing_header(tmp_path):
+    output = tmp_path / 'events.csv'
+    leads = [{'Lead Number': 1, 'Lead Source': 'Google'}, {'Lead Number': 2, 'Lead Source': 'Reference'}]
+    for _ in range(2):
+        asyncio.run(IngestionPipeline(LeadScorer(), str(output), max_wait=0.01).run(_events(leads)))
+    scored = pd.read_csv(output)
+    assert scored['Lead Number'].tolist() == [1, 2, 1, 2]
+
+    # Arquivo com outro esquema (ex.: gravado com modelo): não mistura as colunas
+    output.write_text('Lead Number,probability\n7,0.5\n', encoding='utf-8')
+    pipeline = IngestionPipeline(LeadScorer(), str(output), max_wait=0.01)
+    asyncio.run(pipeline.run(_events(leads)))
+    assert output.read_text(encoding='utf-8') == 'Lead Number,probability\n7,0.5\n'
+    assert pipeline.output_path != str(output)
+    assert pd.read_csv(pipeline.output_path)['Lead Number'].tolist() == [1, 2]
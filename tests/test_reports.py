@@ -0,0 +1,39 @@
+"""
+Testes dos relatórios de leads com lookup pelo índice
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from scoring_model import LeadScorer
+from utils import LeadIndex, generate_lead_report, write_lead_reports
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'Lead_Scoring.csv')
+
+
+def _scored_leads():
+    return LeadScorer().score_leads(pd.read_csv(DATA_PATH))
+
+
+def test_index_lookup_matches_column_scan():
+    leads = _scored_leads()
+    index = LeadIndex(leads)
+
+    for lead_id in leads['Lead Number'].sample(25, random_state=0):
+        assert generate_lead_report(leads, lead_id, index) == generate_lead_report(leads, lead_id)
+    assert leads['Lead Number'].max() + 1 not in index
+
+
+def test_bulk_reports_match_single_reports(tmp_path):
+    leads = _scored_leads()
+    lead_ids = leads.loc[leads['Prioridade'] == 'ALTA', 'Lead Number'].tolist()
+    output = tmp_path / 'alta.txt'
+
+    count = write_lead_reports(leads, str(output))
+
+    assert count == len(lead_ids)
+    expected = ''.join(generate_lead_report(leads, lead_id) + '\n' for lead_id in lead_ids)
+    assert output.read_text(encoding='utf-8') == expected
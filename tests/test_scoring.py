@@ -0,0 +1,51 @@
+"""
+Testes do Lead Score: caminho vetorizado x regras linha a linha e spec das regras
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from scoring_model import LeadScorer
+from scoring_rules import ScoringRules, load_rules
+from storage import load_compact
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'Lead_Scoring.csv')
+
+
+@pytest.mark.parametrize('load', [pd.read_csv, load_compact], ids=['csv', 'compacto'])
+def test_vectorized_scores_match_row_by_row(load):
+    scorer = LeadScorer()
+    leads = load(DATA_PATH)
+    row_scores = [scorer.calculate_business_score(lead) for lead in leads.to_dict('records')]
+
+    scored = scorer.score_leads(leads)
+
+    assert scored['Lead_Score'].tolist() == row_scores
+    assert scored['Prioridade'].tolist() == [scorer.get_priority(score) for score in row_scores]
+
+
+def test_numeric_text_scores_like_vectorized_path():
+    scorer = LeadScorer()
+    leads = [{'TotalVisits': '3', 'Total Time Spent on Website': 'n/d'}, {'Lead Source': 'Reference'}]
+
+    scored = scorer.score_leads(pd.DataFrame.from_records(leads))
+
+    assert scored['Lead_Score'].tolist() == [scorer.calculate_business_score(lead) for lead in leads]
+
+
+def test_rules_spec_round_trip():
+    rules = load_rules()
+    assert ScoringRules.from_dict(json.loads(json.dumps(rules.to_dict()))) == rules
+
+
+def test_rules_spec_rejects_inconsistent_bins():
+    spec = load_rules().to_dict()
+    rule = next(iter(spec['numeric'].values()))
+    rule['bins'] = rule['bins'][::-1]
+    with pytest.raises(ValueError, match='ordem crescente'):
+        ScoringRules.from_dict(spec)
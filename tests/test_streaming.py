@@ -0,0 +1,50 @@
+"""
+Testes do scoring em streaming e em shards contra o pipeline em memória
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from lead_ranking import top_leads
+from scoring_model import LeadScorer
+from streaming import STREAM_COLUMNS, parallel_score_csv, stream_score_csv
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'Lead_Scoring.csv')
+MIN_SCORE = 60
+TOP_N = 50
+
+
+@pytest.fixture(scope='module')
+def in_memory():
+    leads = LeadScorer().score_leads(pd.read_csv(DATA_PATH, usecols=STREAM_COLUMNS))
+    promising = top_leads(leads, TOP_N, min_score=MIN_SCORE, mask=(leads['Converted'] == 0).to_numpy())
+    return leads, promising
+
+
+def _check_outputs(output_dir, in_memory):
+    leads, promising = in_memory
+    scored = pd.read_csv(os.path.join(output_dir, 'leads_with_scores.csv'))
+    streamed = pd.read_csv(os.path.join(output_dir, 'promising_leads.csv'))
+    for col in ('Lead Number', 'Lead_Score', 'Prioridade'):
+        assert scored[col].tolist() == leads[col].tolist()
+        assert streamed[col].tolist() == promising[col].tolist()
+
+
+def test_stream_matches_in_memory(tmp_path, in_memory):
+    summary = stream_score_csv(DATA_PATH, str(tmp_path), chunksize=1_000, min_score=MIN_SCORE, top_n=TOP_N)
+
+    _check_outputs(tmp_path, in_memory)
+    assert summary['rows'] == len(in_memory[0])
+
+
+def test_shards_match_in_memory(tmp_path, in_memory):
+    summary = parallel_score_csv(DATA_PATH, str(tmp_path), workers=2, min_score=MIN_SCORE, top_n=TOP_N,
+                                 block_size=64 << 10)
+
+    _check_outputs(tmp_path, in_memory)
+    assert summary['shards'] > 1
+    assert summary['priority_counts'] == in_memory[0]['Prioridade'].value_counts().to_dict()